@@ -1,4 +1,4 @@
-from flask import Flask, render_template_string, request, jsonify
+from flask import Flask, render_template, request, jsonify
 import subprocess
 import json
 import os
@@ -458,6 +458,9 @@ TEMPLATE = """
 </html>
 """
 
+# Compiled once at startup instead of re-parsing the template per request
+index_template = app.jinja_env.from_string(TEMPLATE)
+
 @app.route("/")
 def index():
     """Resilience dashboard main page"""
@@ -494,7 +497,7 @@ def index():
             'status': 'running'
         }
     
-    return render_template_string(TEMPLATE, 
+    return render_template(index_template, 
         metrics=metrics,
         fragile_info=fragile_info,
         resilient_info=resilient_info
@@ -1,4 +1,4 @@
-from flask import Flask, render_template_string, request
+from flask import Flask, render_template, request
 import redis
 import os
 import logging
@@ -196,6 +196,9 @@ TEMPLATE = """
 </html>
 """
 
+# Compiled once at startup instead of re-parsing the template per request
+index_template = app.jinja_env.from_string(TEMPLATE)
+
 @app.route("/", methods=["GET", "POST"])
 def index():
     wfh = 0
@@ -231,7 +234,7 @@ def index():
             # Redis connection failed when reading votes
             pass
     
-    return render_template_string(TEMPLATE, wfh=wfh, wfo=wfo, redis_available=redis_available, redis_host=REDIS_HOST, show_error=show_error, vote_success=vote_success)
+    return render_template(index_template, wfh=wfh, wfo=wfo, redis_available=redis_available, redis_host=REDIS_HOST, show_error=show_error, vote_success=vote_success)
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000) 
\ No newline at end of file
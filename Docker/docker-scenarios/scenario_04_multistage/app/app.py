@@ -1,4 +1,4 @@
-from flask import Flask, render_template_string, request, jsonify
+from flask import Flask, render_template, request, jsonify
 import subprocess
 import json
 import os
@@ -651,6 +651,9 @@ TEMPLATE = """
 </html>
 """
 
+# Compiled once at startup instead of re-parsing the template per request
+index_template = app.jinja_env.from_string(TEMPLATE)
+
 @app.route("/")
 def index():
     """Interactive multi-stage build comparison dashboard with enhanced real-time features"""
@@ -669,7 +672,7 @@ def index():
     
     logger.info(f"Dashboard loaded - Bloated: {'✅' if bloated_info else '❌'}, Optimized: {'✅' if optimized_info else '❌'}, Containers: {len(container_stats)}, Recent builds: {len(build_progress) if build_progress else 0}")
     
-    return render_template_string(TEMPLATE, 
+    return render_template(index_template, 
                                 bloated_info=bloated_info,
                                 optimized_info=optimized_info,
                                 container_stats=container_stats,
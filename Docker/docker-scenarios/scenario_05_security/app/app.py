@@ -1,4 +1,4 @@
-from flask import Flask, render_template_string, request, jsonify
+from flask import Flask, render_template, request, jsonify
 import subprocess
 import json
 import os
@@ -457,6 +457,9 @@ TEMPLATE = """
 </html>
 """
 
+# Compiled once at startup instead of re-parsing the template per request
+index_template = app.jinja_env.from_string(TEMPLATE)
+
 @app.route("/")
 def index():
     """Security dashboard main page"""
@@ -493,7 +496,7 @@ def index():
             'status': 'running'
         }
     
-    return render_template_string(TEMPLATE, 
+    return render_template(index_template, 
         metrics=metrics,
         vulnerable_info=vulnerable_info,
         secure_info=secure_info
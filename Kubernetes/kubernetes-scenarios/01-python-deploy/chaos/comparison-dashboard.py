@@ -4,36 +4,26 @@
 Visual comparison: Chaos (Manual YAML) vs Hero (Python Automation)
 """
 
-from flask import Flask, render_template_string, jsonify
-import subprocess
-import json
+from flask import Flask, Response, jsonify
 from datetime import datetime
+import functools
+import json
 import threading
 import time
+from kubernetes import client, config, watch
+from kubernetes.client.rest import ApiException
 
 app = Flask(__name__)
 
-# Global state
-deployment_state = {
-    'chaos': {
-        'status': 'unknown',
-        'pods_running': 0,
-        'pods_desired': 2,
-        'services': 0,
-        'errors': [],
-        'deployment_time': 0,
-        'uptime_percent': 0,
-    },
-    'hero': {
-        'status': 'unknown',
-        'pods_running': 0,
-        'pods_desired': 2,
-        'services': 0,
-        'errors': [],
-        'deployment_time': 0,
-        'uptime_percent': 0,
-    }
+# Dashboard card -> namespace it shows
+NAMESPACES = {
+    'chaos': 'vote-app-chaos',
+    'hero': 'vote-app',
 }
+# Seconds to wait before re-listing after the API server went away
+WATCH_RETRY_DELAY = 5
+# Comment line sent on idle event streams so proxies keep them open
+SSE_KEEPALIVE_SECONDS = 15
 
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -408,23 +398,18 @@ HTML_TEMPLATE = """
         </div>
 
         <div class="refresh-indicator">
-            <p>🔄 Dashboard refreshes every 5 seconds | Last update: <span id="last-update">Never</span></p>
+            <p>🔄 Live updates from the cluster | Last update: <span id="last-update">Never</span></p>
         </div>
     </div>
 
     <script>
-        function updateDashboard() {
-            fetch('/api/status')
-                .then(response => response.json())
-                .then(data => {
-                    // Update chaos metrics
-                    updateCard('chaos', data.chaos);
-                    updateCard('hero', data.hero);
+        function updateDashboard(data) {
+            // Update chaos metrics
+            updateCard('chaos', data.chaos);
+            updateCard('hero', data.hero);
 
-                    // Update timestamp
-                    document.getElementById('last-update').textContent = new Date().toLocaleTimeString();
-                })
-                .catch(error => console.error('Error fetching status:', error));
+            // Update timestamp
+            document.getElementById('last-update').textContent = new Date().toLocaleTimeString();
         }
 
         function updateCard(type, data) {
@@ -468,18 +453,30 @@ HTML_TEMPLATE = """
             uptimeEl.className = `metric-value ${data.uptime_percent > 80 ? 'good' : (data.uptime_percent > 0 ? 'warning' : 'bad')}`;
         }
 
-        // Initial load
-        updateDashboard();
-
-        // Auto-refresh every 5 seconds
-        setInterval(updateDashboard, 5000);
+        // The server pushes the current status on connect and again on every
+        // change; EventSource reconnects by itself if the stream drops
+        const events = new EventSource('/api/events');
+        events.onmessage = event => updateDashboard(JSON.parse(event.data));
+        events.onerror = () => console.error('Status stream interrupted, reconnecting...');
     </script>
 </body>
 </html>
 """
 
-def check_deployment_status(namespace):
-    """Check the status of a deployment"""
+# The dashboard page has no per-request data, so render it once
+DASHBOARD_HTML = app.jinja_env.from_string(HTML_TEMPLATE).render()
+
+@functools.lru_cache(maxsize=None)
+def core_api():
+    """Load kubeconfig once; every watch shares the same API connection"""
+    try:
+        config.load_kube_config()
+    except config.ConfigException:
+        config.load_incluster_config()
+    return client.CoreV1Api()
+
+def check_deployment_status(pods, services):
+    """Status of a deployment from its namespace's pods and services"""
     status = {
         'status': 'unknown',
         'pods_running': 0,
@@ -490,73 +487,157 @@ def check_deployment_status(namespace):
         'uptime_percent': 0,
     }
 
-    try:
-        # Check pods
-        cmd = f"kubectl get pods -n {namespace} -o json"
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-
-        if result.returncode == 0:
-            pods_data = json.loads(result.stdout)
-            items = pods_data.get('items', [])
-
-            running = sum(1 for item in items if item.get('status', {}).get('phase') == 'Running')
-            status['pods_running'] = running
-            status['pods_desired'] = len(items) if len(items) > 0 else 2
-
-            # Check for errors in pod status
-            for item in items:
-                pod_name = item['metadata']['name']
-                pod_status = item.get('status', {})
-                container_statuses = pod_status.get('containerStatuses', [])
-
-                for cs in container_statuses:
-                    waiting = cs.get('state', {}).get('waiting', {})
-                    if waiting:
-                        reason = waiting.get('reason', 'Unknown')
-                        status['errors'].append(f"{pod_name}: {reason}")
-
-            # Calculate uptime percentage
-            if status['pods_desired'] > 0:
-                status['uptime_percent'] = int((running / status['pods_desired']) * 100)
-
-        # Check services
-        cmd = f"kubectl get svc -n {namespace} -o json"
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-
-        if result.returncode == 0:
-            svc_data = json.loads(result.stdout)
-            status['services'] = len(svc_data.get('items', []))
-
-        # Determine overall status
-        if status['pods_running'] == status['pods_desired'] and status['services'] > 0:
-            status['status'] = 'healthy'
-        elif status['pods_running'] > 0:
-            status['status'] = 'degraded'
-        else:
-            status['status'] = 'failed'
-
-    except Exception as e:
-        status['errors'].append(str(e))
-        status['status'] = 'unknown'
+    running = sum(1 for pod in pods if pod.status and pod.status.phase == 'Running')
+    status['pods_running'] = running
+    status['pods_desired'] = len(pods) if len(pods) > 0 else 2
+
+    # Check for errors in pod status
+    for pod in pods:
+        for cs in (pod.status and pod.status.container_statuses) or []:
+            waiting = cs.state and cs.state.waiting
+            if waiting:
+                status['errors'].append(f"{pod.metadata.name}: {waiting.reason or 'Unknown'}")
+
+    # Calculate uptime percentage
+    if status['pods_desired'] > 0:
+        status['uptime_percent'] = int((running / status['pods_desired']) * 100)
+
+    status['services'] = len(services)
+
+    # Determine overall status
+    if status['pods_running'] == status['pods_desired'] and status['services'] > 0:
+        status['status'] = 'healthy'
+    elif status['pods_running'] > 0:
+        status['status'] = 'degraded'
+    else:
+        status['status'] = 'failed'
 
     return status
 
+class ClusterCache:
+    """In-memory copy of the pods and services in NAMESPACES, kept current
+    by one list+watch per namespace and kind (an informer). Requests only
+    read the precomputed snapshot, so viewers cost the cluster nothing;
+    `version` moves (and `changed` fires) only when a card's status does."""
+
+    KINDS = ('pods', 'services')
+
+    def __init__(self, namespaces):
+        self.namespaces = namespaces
+        self.lock = threading.Lock()
+        # (namespace, kind) -> {name: object}; missing until the first list
+        self.objects = {}
+        # namespace -> last API error, cleared by the next successful list
+        self.errors = {}
+        self.changed = threading.Condition(self.lock)
+        self.version = 0
+        self.snapshot = None
+        with self.lock:
+            self.publish()
+
+    def start(self):
+        for namespace in self.namespaces.values():
+            for kind in self.KINDS:
+                threading.Thread(target=self.run, args=(namespace, kind), daemon=True,
+                                 name=f"watch-{namespace}-{kind}").start()
+
+    def run(self, namespace, kind):
+        """List, then follow changes; re-list whenever the watch breaks"""
+        while True:
+            try:
+                core = core_api()
+                list_func = core.list_namespaced_pod if kind == 'pods' else core.list_namespaced_service
+                listing = list_func(namespace)
+                with self.lock:
+                    self.objects[(namespace, kind)] = {item.metadata.name: item for item in listing.items}
+                    self.errors.pop(namespace, None)
+                    self.publish()
+
+                # Resumes from the last seen resourceVersion on reconnect;
+                # raises once that version has expired (410) so we re-list
+                for event in watch.Watch().stream(list_func, namespace,
+                                                  resource_version=listing.metadata.resource_version):
+                    item = event['object']
+                    with self.lock:
+                        store = self.objects[(namespace, kind)]
+                        if event['type'] == 'DELETED':
+                            store.pop(item.metadata.name, None)
+                        else:
+                            store[item.metadata.name] = item
+                        self.publish()
+            except ApiException as e:
+                if e.status != 410:
+                    self.fail(namespace, f"Kubernetes API: {e.status} {e.reason}")
+                    time.sleep(WATCH_RETRY_DELAY)
+            except Exception as e:
+                self.fail(namespace, str(e))
+                time.sleep(WATCH_RETRY_DELAY)
+
+    def fail(self, namespace, error):
+        with self.lock:
+            self.errors[namespace] = error
+            self.publish()
+
+    def build_snapshot(self):
+        """Per-card status from the cached objects (caller holds the lock)"""
+        snapshot = {}
+        for card, namespace in self.namespaces.items():
+            pods = self.objects.get((namespace, 'pods'))
+            services = self.objects.get((namespace, 'services'))
+            if pods is None or services is None or namespace in self.errors:
+                status = check_deployment_status([], [])
+                status['status'] = 'unknown'
+                status['errors'] = [self.errors.get(namespace, "Waiting for cluster data...")]
+            else:
+                status = check_deployment_status(list(pods.values()), list(services.values()))
+            snapshot[card] = status
+        return snapshot
+
+    def publish(self):
+        """Recompute the snapshot after a change (caller holds the lock)"""
+        snapshot = self.build_snapshot()
+        if snapshot == self.snapshot:
+            return  # e.g. a pod's conditions moved but nothing the cards show
+        self.snapshot = snapshot
+        self.version += 1
+        # Serialized once here, not once per connected viewer
+        self.event = f"data: {json.dumps(dict(snapshot, timestamp=datetime.now().isoformat()))}\n\n"
+        self.changed.notify_all()
+
+    def wait_for_change(self, version, timeout):
+        """(version, event) once the version differs from `version`, or the
+        unchanged pair after `timeout` seconds"""
+        with self.changed:
+            self.changed.wait_for(lambda: self.version != version, timeout)
+            return self.version, self.event
+
+cluster = ClusterCache(NAMESPACES)
+
 @app.route('/')
 def index():
     """Serve the dashboard"""
-    return render_template_string(HTML_TEMPLATE)
+    return DASHBOARD_HTML
 
 @app.route('/api/status')
 def get_status():
-    """Get current deployment status"""
-    chaos_status = check_deployment_status('vote-app-chaos')
-    hero_status = check_deployment_status('vote-app')
-
-    return jsonify({
-        'chaos': chaos_status,
-        'hero': hero_status,
-        'timestamp': datetime.now().isoformat()
-    })
+    """Get current deployment status (from the watch cache)"""
+    return jsonify(dict(cluster.snapshot, timestamp=datetime.now().isoformat()))
+
+@app.route('/api/events')
+def status_events():
+    """Server-sent events: the current status, then one event per change"""
+    def stream():
+        version = None
+        while True:
+            latest, event = cluster.wait_for_change(version, SSE_KEEPALIVE_SECONDS)
+            if latest == version:
+                yield ": keep-alive\n\n"
+            else:
+                version = latest
+                yield event
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 def find_free_port(start_port=5000, max_attempts=100):
     """Find a free port starting from start_port"""
@@ -586,11 +667,14 @@ def main():
     # Find available port
     port = find_free_port(5000)
 
+    print("👀 Watching pods and services in: " + ", ".join(NAMESPACES.values()))
+    cluster.start()
+
     print("📊 Starting dashboard server...")
     print(f"   🌐 URL: http://localhost:{port}")
     if port != 5000:
         print(f"   ℹ️  Port 5000 was busy, using port {port} instead")
-    print("   🔄 Auto-refreshes every 5 seconds")
+    print("   🔄 Updates live as pods and services change")
     print("\n💡 This dashboard compares:")
     print("   🧨 Chaos: Manual YAML deployment (broken)")
     print("   🦸 Hero: Python automated deployment (working)")
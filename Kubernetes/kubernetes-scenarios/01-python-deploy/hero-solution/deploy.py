@@ -10,6 +10,10 @@ import subprocess
 import time
 from pathlib import Path
 
+# Shared helpers live next to the scenario folders
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from image_registry import pushed_image_reference
+
 def run_command(cmd, description, check=True):
     """Run a command and print output"""
     print(f"\n{'='*60}")
@@ -84,6 +88,23 @@ def main():
         if not run_command(f"docker build -t {image_name} .", "Build Docker image"):
             return False
 
+    # Push to the local registry started by universal-setup.py
+    # (SETUP_LOCAL_REGISTRY=1); nodes then pull only the layers they lack.
+    # Deployed by digest: with a plain tag and IfNotPresent, nodes that
+    # already have the tag would keep the old image after a rebuild
+    registry = os.getenv('WORKSHOP_REGISTRY')
+    if registry:
+        print(f"\n📦 Pushing image to {registry}...")
+        if not run_command(
+            f"docker tag {image_name} {registry}/{image_name} && docker push {registry}/{image_name}",
+            "Push image to local registry"
+        ):
+            return False
+        image_name = pushed_image_reference(f"{registry}/{image_name}")
+        if not image_name:
+            print("\n❌ Could not read the pushed image's digest")
+            return False
+
     # Step 2: Update k8s manifest with image name
     print("\n📝 Updating Kubernetes manifest...")
     with open('k8s-manifests.yaml', 'r') as f:
@@ -99,10 +120,17 @@ def main():
             f'image: {image_name}\n        imagePullPolicy: IfNotPresent'
         )
 
+    # Serve with multi-worker gunicorn unless SERVER_MODE=development is exported
+    server_mode = os.getenv('SERVER_MODE', 'production')
+    manifest = manifest.replace(
+        'name: SERVER_MODE\n          value: "production"',
+        f'name: SERVER_MODE\n          value: "{server_mode}"'
+    )
+
     with open('k8s-manifests-updated.yaml', 'w') as f:
         f.write(manifest)
 
-    print("✅ Manifest updated")
+    print(f"✅ Manifest updated (server mode: {server_mode})")
 
     # Step 3: Deploy to Kubernetes
     if not run_command(
@@ -6,36 +6,419 @@ Stores votes in Redis - Simple and works!
 This is the hero solution version of the voting app for Kubernetes deployment demo.
 For the basic version, see simple-voting-app/vote-app.py
 """
-from flask import Flask, render_template_string, request, jsonify
+from flask import Flask, request, jsonify
+from collections import Counter
 import redis
 import os
+import gzip
+import sys
 import json
+import math
+import time
+import atexit
+import hashlib
+import zlib
+import queue
+import random
+import signal
+import socket
+import threading
 
 app = Flask(__name__)
 
-# Connect to Redis with retry
+# Redis connection settings
 redis_host = os.getenv('REDIS_HOST', 'localhost')
 redis_port = int(os.getenv('REDIS_PORT', 6379))
+redis_max_connections = int(os.getenv('REDIS_MAX_CONNECTIONS', 50))
+redis_health_check_interval = int(os.getenv('REDIS_HEALTH_CHECK_INTERVAL', 30))
+redis_socket_timeout = float(os.getenv('REDIS_SOCKET_TIMEOUT', 5))
+redis_connect_timeout = float(os.getenv('REDIS_CONNECT_TIMEOUT', 2))
+redis_ping_timeout = float(os.getenv('REDIS_PING_TIMEOUT', 1))
+# 'lazy': start serving at once, /health reports degraded until Redis answers
+# 'blocking': wait for Redis before the app starts (the old behaviour)
+redis_startup_mode = os.getenv('REDIS_STARTUP_MODE', 'lazy')
+# '1': REDIS_HOST:REDIS_PORT is any node of a Redis Cluster, so VOTE_SHARDS
+# can spread the counters over several primaries
+redis_cluster = os.getenv('REDIS_CLUSTER', '0') == '1'
 
-def connect_to_redis(max_retries=30):
-    """Connect to Redis with retries"""
-    import time
+def connect_to_cluster(max_connections, timeout, max_retries=30):
+    """RedisCluster maps the slots when it is created, so wait for a node"""
+    from redis.cluster import RedisCluster
     for i in range(max_retries):
         try:
-            r = redis.Redis(host=redis_host, port=redis_port, decode_responses=True)
-            r.ping()
-            print(f"✅ Connected to Redis at {redis_host}:{redis_port}")
-            return r
-        except redis.exceptions.ConnectionError:
-            print(f"⏳ Waiting for Redis... (attempt {i+1}/{max_retries})")
+            return RedisCluster(
+                host=redis_host,
+                port=redis_port,
+                # Each node gets its own pool of this size
+                connection_pool_class=redis.BlockingConnectionPool,
+                max_connections=max_connections,
+                socket_timeout=timeout,
+                socket_connect_timeout=min(timeout, redis_connect_timeout),
+                decode_responses=True,
+            )
+        except (redis.exceptions.RedisError, redis.exceptions.RedisClusterException) as e:
+            print(f"⏳ Waiting for Redis Cluster... (attempt {i+1}/{max_retries}): {e}")
             time.sleep(2)
+    raise Exception("Could not reach any Redis Cluster node")
+
+if redis_cluster:
+    r = connect_to_cluster(redis_max_connections, redis_socket_timeout)
+    health_redis = connect_to_cluster(2, redis_ping_timeout)
+else:
+    # One pool shared by every request thread; connections are opened on first
+    # use, and a request waits for a free one instead of failing when it is full
+    redis_pool = redis.BlockingConnectionPool(
+        host=redis_host,
+        port=redis_port,
+        max_connections=redis_max_connections,
+        timeout=redis_socket_timeout,
+        health_check_interval=redis_health_check_interval,
+        socket_timeout=redis_socket_timeout,
+        socket_connect_timeout=redis_connect_timeout,
+        decode_responses=True,
+    )
+    r = redis.Redis(connection_pool=redis_pool)
+
+    # Readiness PINGs get their own two-connection pool with a short timeout, so
+    # a dead Redis fails the probe quickly instead of queueing behind requests
+    health_redis = redis.Redis(connection_pool=redis.BlockingConnectionPool(
+        host=redis_host,
+        port=redis_port,
+        max_connections=2,
+        timeout=redis_ping_timeout,
+        socket_timeout=redis_ping_timeout,
+        socket_connect_timeout=redis_ping_timeout,
+    ))
+
+# Votes live in a Redis hash (one field per option) so every replica can
+# bump its option with a single atomic HINCRBY - no read-modify-write race.
+# The braces are a cluster hash tag: they put the hash and its migration
+# marker in the same slot as the legacy 'votes' key.
+VOTES_KEY = '{votes}:counts'
+LEGACY_VOTES_KEY = 'votes'
+MIGRATED_KEY = '{votes}:migrated'
+VOTE_OPTIONS = ('WFH', 'WFO')
+# Every write also publishes the options it touched here
+VOTES_CHANNEL = 'votes:updates'
+
+# Older releases stored all counts as one JSON string under 'votes'. The
+# first new pod seeds the hash from it exactly once (guarded by the marker)
+# and leaves the JSON alone, so old pods keep working during a rolling upgrade.
+SEED_VOTES_SCRIPT = r.register_script("""
+if not redis.call('SET', KEYS[3], 1, 'NX') then
+    return 0
+end
+if redis.call('TYPE', KEYS[1])['ok'] == 'string' then
+    local votes = cjson.decode(redis.call('GET', KEYS[1]))
+    for option, count in pairs(votes) do
+        redis.call('HINCRBY', KEYS[2], option, count)
+    end
+    return 1
+end
+return 0
+""")
+
+def init_votes():
+    """Seed the hash from legacy JSON counts and make sure every option has a field"""
+    if SEED_VOTES_SCRIPT(keys=[LEGACY_VOTES_KEY, VOTES_KEY, MIGRATED_KEY]):
+        print(f"🔁 Seeded '{VOTES_KEY}' from the legacy JSON '{LEGACY_VOTES_KEY}' key")
+    for option in VOTE_OPTIONS:
+        r.hsetnx(VOTES_KEY, option, 0)
+
+# Optional sharded counters for hot-key relief: each vote goes to one of
+# VOTE_SHARDS hashes (picked by pod name, or at random per write) that a
+# Redis Cluster can place on different nodes. Reads roll all of them up,
+# plus the unsharded counts hash which keeps any pre-sharding counts.
+vote_shards = int(os.getenv('VOTE_SHARDS', 1))
+vote_shard_strategy = os.getenv('VOTE_SHARD_STRATEGY', 'pod')
+
+if vote_shards > 1:
+    SHARD_KEYS = [f'votes:shard:{i}' for i in range(vote_shards)]
+    POD_SHARD_KEY = SHARD_KEYS[zlib.crc32(socket.gethostname().encode()) % vote_shards]
+    COUNTER_KEYS = [VOTES_KEY] + SHARD_KEYS
+else:
+    COUNTER_KEYS = [VOTES_KEY]
+
+def vote_key():
+    """Hash the next vote is counted in"""
+    if vote_shards <= 1:
+        return VOTES_KEY
+    if vote_shard_strategy == 'random':
+        return random.choice(SHARD_KEYS)
+    return POD_SHARD_KEY
+
+def vote_pipeline(client):
+    """Pipeline for vote writes: MULTI/EXEC only when the counters share one
+    key on a single server (cluster pipelines can't run transactions)"""
+    return client.pipeline(transaction=vote_shards <= 1 and not redis_cluster)
+
+def queue_vote_reads(pipe):
+    """Add one HGETALL per counter hash to a pipeline"""
+    for key in COUNTER_KEYS:
+        pipe.hgetall(key)
+
+def sum_votes(replies):
+    """Roll HGETALL replies up into {option: int} for every known option"""
+    votes = dict.fromkeys(VOTE_OPTIONS, 0)
+    for raw in replies:
+        for option in VOTE_OPTIONS:
+            votes[option] += int(raw.get(option, 0))
+    return votes
+
+def read_votes():
+    """Current vote counts"""
+    # No MULTI: shard keys may live in different cluster slots
+    pipe = r.pipeline(transaction=False)
+    queue_vote_reads(pipe)
+    return sum_votes(pipe.execute())
+
+redis_ready = False
+redis_ready_lock = threading.Lock()
+
+def ensure_redis():
+    """Ping Redis and prepare the vote keys once; True when Redis is usable"""
+    global redis_ready
+    if redis_ready:
+        return True
+    with redis_ready_lock:
+        if redis_ready:
+            return True
+        try:
+            r.ping()
+            init_votes()
+        except redis.exceptions.RedisError:
+            return False
+        redis_ready = True
+        print(f"✅ Connected to Redis at {redis_host}:{redis_port}")
+        return True
+
+def connect_to_redis(max_retries=30):
+    """Block until Redis is reachable, with retries"""
+    for i in range(max_retries):
+        if ensure_redis():
+            return
+        print(f"⏳ Waiting for Redis... (attempt {i+1}/{max_retries})")
+        time.sleep(2)
     raise Exception("Could not connect to Redis after multiple attempts")
 
-r = connect_to_redis()
+if redis_startup_mode == 'blocking':
+    connect_to_redis()
+
+# Optional write-behind batching: votes are counted in memory and flushed to
+# Redis with one pipelined call every VOTE_BATCH_INTERVAL_MS milliseconds or
+# every VOTE_BATCH_MAX_VOTES votes, whichever comes first. 0 disables it.
+batch_interval_ms = int(os.getenv('VOTE_BATCH_INTERVAL_MS', 0))
+batch_max_votes = int(os.getenv('VOTE_BATCH_MAX_VOTES', 500))
+
+class VoteBatcher:
+    """Aggregates votes per option and flushes them to Redis in one pipeline"""
+
+    def __init__(self, client, interval_ms, max_votes):
+        self.client = client
+        self.interval = interval_ms / 1000
+        self.max_votes = max_votes
+        self.pending = Counter()
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+
+    def add(self, option):
+        """Queue one vote; wakes the flusher early once the batch is full"""
+        with self.lock:
+            self.pending[option] += 1
+            full = self.pending.total() >= self.max_votes
+            # Started lazily so each forked worker gets its own flusher
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='vote-batcher', daemon=True)
+                self.thread.start()
+        if full:
+            self.wakeup.set()
+
+    def _run(self):
+        while True:
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Write all pending votes to Redis, returns how many were flushed"""
+        with self.lock:
+            batch, self.pending = self.pending, Counter()
+        if not batch:
+            return 0
+
+        try:
+            pipe = vote_pipeline(self.client)
+            for option, count in batch.items():
+                pipe.hincrby(vote_key(), option, count)
+            pipe.publish(VOTES_CHANNEL, ','.join(batch))
+            pipe.execute()
+        except redis.exceptions.RedisError as e:
+            # Keep the votes so the next flush retries them
+            with self.lock:
+                self.pending.update(batch)
+            print(f"⚠️  Vote flush failed, will retry: {e}")
+            return 0
+
+        print(f"Votes flushed: {dict(batch)}")
+        return batch.total()
+
+vote_batcher = VoteBatcher(r, batch_interval_ms, batch_max_votes) if batch_interval_ms > 0 else None
+
+def install_shutdown_flush(batcher):
+    """Flush pending votes on SIGTERM (pod rollout) and at interpreter exit"""
+    atexit.register(batcher.flush)
+    if threading.current_thread() is not threading.main_thread():
+        return
+
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def handle_sigterm(signum, frame):
+        print(f"🛑 SIGTERM received, flushed {batcher.flush()} pending votes")
+        if callable(previous):
+            previous(signum, frame)
+        else:
+            sys.exit(0)
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+if vote_batcher:
+    install_shutdown_flush(vote_batcher)
+
+class VoteUpdateListener:
+    """One Redis subscription per process, fanned out to local callbacks"""
+
+    def __init__(self, client):
+        self.client = client
+        self.callbacks = []
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def add_callback(self, callback):
+        """Call callback(options) whenever any pod records votes"""
+        self.callbacks.append(callback)
+
+    def ensure_started(self):
+        # Started lazily so each forked worker gets its own subscription
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='vote-listener', daemon=True)
+                self.thread.start()
+
+    def _notify(self, options):
+        for callback in self.callbacks:
+            callback(options)
+
+    def _run(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(VOTES_CHANNEL)
+                # Anything may have changed while we were not subscribed
+                self._notify(VOTE_OPTIONS)
+                while True:
+                    # Polling with a timeout keeps idle subscriptions clear
+                    # of the pool's socket timeout
+                    message = pubsub.get_message(timeout=1.0)
+                    if message:
+                        self._notify(message['data'].split(','))
+            except redis.exceptions.RedisError as e:
+                print(f"⚠️  Vote listener lost Redis, retrying: {e}")
+                time.sleep(2)
+
+vote_listener = VoteUpdateListener(r)
+
+# /results is served from a per-process cache that is dropped as soon as a
+# vote notification arrives; RESULTS_CACHE_TTL only bounds staleness while
+# the subscription is down. 0 disables caching.
+results_cache_ttl = float(os.getenv('RESULTS_CACHE_TTL', 1.0))
+
+class ResultsCache:
+    """Serialized /results body and its ETag, refreshed on demand"""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.body = None
+        self.etag = None
+        self.expires = 0.0
+        self.generation = 0
+
+    def invalidate(self, options=None):
+        self.generation += 1
+        self.expires = 0.0
 
-# Initialize vote counts if not exists
-if not r.exists('votes'):
-    r.set('votes', json.dumps({'WFH': 0, 'WFO': 0}))
+    def get(self):
+        # Holding the lock while reading Redis lets one request refresh the
+        # cache while concurrent misses wait for it instead of piling on
+        with self.lock:
+            if time.monotonic() >= self.expires:
+                generation = self.generation
+                self.body = json.dumps(read_votes()).encode()
+                self.etag = hashlib.sha1(self.body).hexdigest()
+                if generation == self.generation:
+                    self.expires = time.monotonic() + self.ttl
+            return self.body, self.etag
+
+results_cache = ResultsCache(results_cache_ttl)
+if results_cache_ttl > 0:
+    vote_listener.add_callback(results_cache.invalidate)
+
+# Seconds between SSE comment lines that keep idle streams open through proxies
+stream_keepalive = float(os.getenv('RESULTS_STREAM_KEEPALIVE', 15))
+# Every open stream pins one gunicorn thread, so cap them per worker well below
+# the thread count; clients over the cap get a 503 and fall back to polling
+gunicorn_threads = int(os.getenv('GUNICORN_THREADS', 50))
+stream_max_clients = int(os.getenv('RESULTS_STREAM_MAX_CLIENTS', gunicorn_threads // 2))
+
+class ResultsBroadcaster:
+    """Pushes changed counts to every /results/stream client of this process"""
+
+    def __init__(self, max_clients):
+        self.max_clients = max_clients
+        self.lock = threading.Lock()
+        self.clients = set()
+        self.last = {}
+        self.closed = False
+
+    def subscribe(self):
+        """A queue of deltas for one client, or None when the worker is full"""
+        client = queue.Queue()
+        with self.lock:
+            if len(self.clients) >= self.max_clients:
+                return None
+            self.clients.add(client)
+            if self.closed:
+                client.put(None)
+        return client
+
+    def unsubscribe(self, client):
+        with self.lock:
+            self.clients.discard(client)
+
+    def publish(self, options):
+        """Listener callback: read Redis once, send the delta to all clients"""
+        if not self.clients:
+            return
+        votes = read_votes()
+        with self.lock:
+            delta = {option: count for option, count in votes.items() if self.last.get(option) != count}
+            self.last = votes
+            clients = list(self.clients)
+        if delta:
+            for client in clients:
+                client.put(delta)
+
+    def close(self):
+        """End every open stream (None tells the generator to return)"""
+        with self.lock:
+            self.closed = True
+            clients = list(self.clients)
+        for client in clients:
+            client.put(None)
+
+results_broadcaster = ResultsBroadcaster(stream_max_clients)
+vote_listener.add_callback(results_broadcaster.publish)
 
 VOTE_TEMPLATE = """
 <!DOCTYPE html>
@@ -208,8 +591,10 @@ VOTE_TEMPLATE = """
                 msg.className = 'message success';
                 msg.style.display = 'block';
 
-                // Update counts
-                updateCounts();
+                // The live stream pushes the new counts on its own
+                if (poller !== null) {
+                    updateCounts();
+                }
 
                 setTimeout(() => {
                     msg.style.display = 'none';
@@ -220,45 +605,98 @@ VOTE_TEMPLATE = """
             });
         }
 
+        function showCounts(data) {
+            // Stream events only carry the options that changed
+            if ('WFH' in data) {
+                document.getElementById('wfh-count').textContent = data.WFH;
+            }
+            if ('WFO' in data) {
+                document.getElementById('wfo-count').textContent = data.WFO;
+            }
+        }
+
         function updateCounts() {
             fetch('/results')
             .then(response => response.json())
-            .then(data => {
-                document.getElementById('wfh-count').textContent = data.WFH;
-                document.getElementById('wfo-count').textContent = data.WFO;
-            });
+            .then(showCounts);
         }
 
-        // Update counts every 2 seconds
-        setInterval(updateCounts, 2000);
+        let poller = null;
+        function startPolling() {
+            // Update counts every 2 seconds
+            if (poller === null) {
+                poller = setInterval(updateCounts, 2000);
+                updateCounts();
+            }
+        }
 
-        // Initial load
-        updateCounts();
+        if (window.EventSource) {
+            // Live updates pushed by the server; reconnects automatically
+            const stream = new EventSource('/results/stream');
+            stream.onmessage = event => showCounts(JSON.parse(event.data));
+            // A non-200 answer (the pod's stream cap) closes it for good
+            stream.onerror = () => {
+                if (stream.readyState === EventSource.CLOSED) {
+                    startPolling();
+                }
+            };
+        } else {
+            startPolling();
+        }
     </script>
 </body>
 </html>
 """
 
+# Browsers and proxies may reuse the page this long before revalidating;
+# the ETag changes whenever a deploy changes the HTML
+PAGE_MAX_AGE = int(os.getenv('PAGE_MAX_AGE', 300))
+
+class StaticPage:
+    """A template rendered once at startup and served from memory, gzipped
+    for clients that accept it"""
+
+    def __init__(self, template):
+        self.body = app.jinja_env.from_string(template).render().encode()
+        self.gzipped = gzip.compress(self.body, compresslevel=9, mtime=0)
+        self.etag = hashlib.sha1(self.body).hexdigest()
+
+    def response(self):
+        gzipped = 'gzip' in request.accept_encodings
+        response = app.response_class(self.gzipped if gzipped else self.body, mimetype='text/html')
+        if gzipped:
+            response.content_encoding = 'gzip'
+        # Each encoding is a different representation, so it gets its own ETag
+        response.set_etag(self.etag + ('-gz' if gzipped else ''))
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.max_age = PAGE_MAX_AGE
+        return response.make_conditional(request)
+
+vote_page = StaticPage(VOTE_TEMPLATE)
+
 @app.route('/')
 def index():
-    return render_template_string(VOTE_TEMPLATE)
+    return vote_page.response()
 
 @app.route('/vote', methods=['POST'])
 def vote():
     data = request.get_json()
     option = data.get('option')
 
-    if option not in ['WFH', 'WFO']:
+    if option not in VOTE_OPTIONS:
         return jsonify({'error': 'Invalid option'}), 400
 
-    # Get current votes
-    votes = json.loads(r.get('votes'))
+    if vote_batcher:
+        vote_batcher.add(option)
+        return jsonify({'success': True, 'queued': True}), 202
 
-    # Increment vote
-    votes[option] += 1
-
-    # Save back to Redis
-    r.set('votes', json.dumps(votes))
+    # Increment and read back in one round trip
+    pipe = vote_pipeline(r)
+    pipe.hincrby(vote_key(), option, 1)
+    queue_vote_reads(pipe)
+    pipe.publish(VOTES_CHANNEL, option)
+    votes = sum_votes(pipe.execute()[1:-1])
 
     print(f"Vote recorded: {option}. Current: WFH={votes['WFH']}, WFO={votes['WFO']}")
 
@@ -266,14 +704,156 @@ def vote():
 
 @app.route('/results')
 def results():
-    votes = json.loads(r.get('votes'))
-    return jsonify(votes)
+    if results_cache_ttl > 0:
+        vote_listener.ensure_started()
+    body, etag = results_cache.get()
+
+    # Pollers revalidate with If-None-Match and get an empty 304 back
+    # until the counts actually change
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@app.route('/results/stream')
+def results_stream():
+    vote_listener.ensure_started()
+    client = results_broadcaster.subscribe()
+    if client is None:
+        response = jsonify({'error': 'Too many open streams, poll /results instead'})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    try:
+        snapshot, _ = results_cache.get()
+    except redis.exceptions.RedisError:
+        results_broadcaster.unsubscribe(client)
+        raise
+
+    def events():
+        try:
+            # Full counts first, then only the options that changed
+            yield f"data: {snapshot.decode()}\n\n"
+            while True:
+                try:
+                    delta = client.get(timeout=stream_keepalive)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if delta is None:
+                    # Worker is shutting down; EventSource reconnects elsewhere
+                    return
+                yield f"data: {json.dumps(delta)}\n\n"
+        finally:
+            results_broadcaster.unsubscribe(client)
+
+    return app.response_class(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+@app.before_request
+def require_redis():
+    # In lazy startup mode the first request may arrive before any health
+    # check has prepared the vote keys
+    if request.endpoint in ('vote', 'results', 'results_stream') and not ensure_redis():
+        return jsonify({'error': 'Redis unavailable'}), 503
 
 @app.route('/health')
 def health():
+    # Readiness: keeps the pod out of the Service while Redis doesn't answer
+    try:
+        ready = ensure_redis() and health_redis.ping()
+    except redis.exceptions.RedisError:
+        ready = False
+    if not ready:
+        return jsonify({'status': 'degraded', 'redis': 'unreachable'}), 503
     return jsonify({'status': 'healthy'})
 
+@app.route('/health/live')
+def health_live():
+    # Liveness: the process is up, whatever Redis is doing
+    return jsonify({'status': 'alive'})
+
+@app.errorhandler(redis.exceptions.RedisError)
+def redis_unavailable(error):
+    print(f"⚠️  Redis error: {error}")
+    return jsonify({'error': 'Redis unavailable'}), 503
+
+# 'production' serves the app with gunicorn, 'development' with Flask's debug server
+server_mode = os.getenv('SERVER_MODE', 'development')
+
+def cpu_limit():
+    """CPUs this container may use: downward API, cgroup quota, then host count"""
+    # CPU_LIMIT is limits.cpu exposed through the downward API in millicores
+    millicores = int(os.getenv('CPU_LIMIT', 0))
+    if millicores > 0:
+        return millicores / 1000
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    return os.cpu_count() or 1
+
+def on_worker_init(worker):
+    """gunicorn hook: flush votes and end streams as soon as SIGTERM arrives.
+    Open /results/stream responses would otherwise keep the worker busy
+    until the arbiter SIGKILLs it, and worker_exit would never run."""
+    handle_exit = worker.handle_exit
+
+    def handle_exit_and_flush(signum, frame):
+        handle_exit(signum, frame)
+        results_broadcaster.close()
+        if vote_batcher:
+            print(f"🛑 SIGTERM received, flushed {vote_batcher.flush()} pending votes")
+
+    # init_signals() already registered the bound method, so re-register
+    worker.handle_exit = handle_exit_and_flush
+    signal.signal(signal.SIGTERM, handle_exit_and_flush)
+
+def on_worker_exit(server, worker):
+    """gunicorn hook: last-chance flush for votes queued after SIGTERM"""
+    if vote_batcher:
+        print(f"🛑 Worker exiting, flushed {vote_batcher.flush()} pending votes")
+
+def run_production_server():
+    """Serve the same app with gunicorn threaded workers sized to the CPU limit"""
+    from gunicorn.app.base import BaseApplication
+
+    options = {
+        'bind': '0.0.0.0:8080',
+        'workers': int(os.getenv('WEB_CONCURRENCY', math.ceil(cpu_limit() * 2) + 1)),
+        # Threads, not processes, hold the long-lived /results/stream clients
+        'worker_class': 'gthread',
+        'threads': gunicorn_threads,
+        'keepalive': int(os.getenv('GUNICORN_KEEPALIVE', 5)),
+        # Finish in-flight requests on SIGTERM, within the pod's grace period
+        'graceful_timeout': int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 25)),
+        'post_worker_init': on_worker_init,
+        'worker_exit': on_worker_exit,
+    }
+
+    class VoteAppServer(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    print(f"gunicorn: {options['workers']} workers x {options['threads']} threads")
+    VoteAppServer().run()
+
 if __name__ == '__main__':
     print("Starting Voting App...")
-    print(f"Redis: {redis_host}:{redis_port}")
-    app.run(host='0.0.0.0', port=8080, debug=True)
+    print(f"Redis: {redis_host}:{redis_port} (pool of {redis_max_connections}, {redis_startup_mode} startup)")
+    if vote_shards > 1:
+        print(f"Sharded counters: {vote_shards} shards ({vote_shard_strategy})")
+    if vote_batcher:
+        print(f"Vote batching: every {batch_interval_ms}ms or {batch_max_votes} votes")
+    if server_mode == 'production':
+        run_production_server()
+    else:
+        app.run(host='0.0.0.0', port=8080, debug=True)
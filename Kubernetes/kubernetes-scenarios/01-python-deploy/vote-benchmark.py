@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+📈 Vote App Benchmark
+Drives /vote and /results at a fixed concurrency and reports throughput,
+p50/p95/p99 latency and lost votes (expected vs. /results totals).
+
+Run it against a deployed app (port-forward first):
+    python3 vote-benchmark.py --url http://localhost:31004
+
+Or against a local copy with a throwaway Redis (redis-server or Docker):
+    python3 vote-benchmark.py --local hero-solution
+    python3 vote-benchmark.py --local simple-voting-app
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# Shared helpers live next to the scenario folders
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from benchmark_stats import percentile
+
+OPTIONS = ('WFH', 'WFO')
+LOCAL_APP_PORT = 8080
+
+class Stats:
+    """Latencies and failures of one endpoint, shared by its worker threads"""
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def record(self, seconds, ok):
+        with self.lock:
+            if ok:
+                self.latencies.append(seconds)
+            else:
+                self.errors += 1
+
+def request(conn, method, path, body=None):
+    """Send one request on a keep-alive connection, returns (status, data)"""
+    headers = {'Content-Type': 'application/json'} if body is not None else {}
+    conn.request(method, path, body=body, headers=headers)
+    response = conn.getresponse()
+    return response.status, response.read()
+
+def read_totals(host, port):
+    """Current WFH/WFO totals reported by /results"""
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    try:
+        status, data = request(conn, 'GET', '/results')
+        if status != 200:
+            raise RuntimeError(f"/results returned HTTP {status}")
+        votes = json.loads(data)
+        return {option: int(votes.get(option, 0)) for option in OPTIONS}
+    finally:
+        conn.close()
+
+def vote_worker(host, port, count, offset, stats, accepted):
+    """Cast `count` votes, alternating options, on one connection"""
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    for i in range(count):
+        option = OPTIONS[(offset + i) % len(OPTIONS)]
+        body = json.dumps({'option': option})
+        start = time.perf_counter()
+        try:
+            status, _ = request(conn, 'POST', '/vote', body)
+            ok = 200 <= status < 300
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            ok = False
+        stats.record(time.perf_counter() - start, ok)
+        if ok:
+            accepted[option] += 1
+    conn.close()
+
+def results_worker(host, port, stop, stats):
+    """Poll /results until told to stop, like a dashboard tab would"""
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            status, _ = request(conn, 'GET', '/results')
+            ok = status == 200
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            ok = False
+        stats.record(time.perf_counter() - start, ok)
+    conn.close()
+
+def summarize(stats, elapsed):
+    """Throughput and latency percentiles (ms) of one endpoint"""
+    latencies = sorted(stats.latencies)
+    return {
+        'requests': len(latencies) + stats.errors,
+        'errors': stats.errors,
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+def wait_for_totals(host, port, expected, settle):
+    """Re-read /results until it matches `expected` or `settle` seconds pass"""
+    deadline = time.monotonic() + settle
+    while True:
+        totals = read_totals(host, port)
+        if totals == expected or time.monotonic() >= deadline:
+            return totals
+        time.sleep(0.2)
+
+def run_benchmark(host, port, votes, concurrency, readers, settle):
+    """Run one benchmark round and return the report as a dict"""
+    before = read_totals(host, port)
+
+    vote_stats = Stats('/vote')
+    results_stats = Stats('/results')
+    per_worker = [dict.fromkeys(OPTIONS, 0) for _ in range(concurrency)]
+    stop = threading.Event()
+
+    voters = [
+        threading.Thread(
+            target=vote_worker,
+            args=(host, port, votes // concurrency + (1 if i < votes % concurrency else 0), i, vote_stats, per_worker[i]),
+        )
+        for i in range(concurrency)
+    ]
+    pollers = [
+        threading.Thread(target=results_worker, args=(host, port, stop, results_stats))
+        for _ in range(readers)
+    ]
+
+    start = time.perf_counter()
+    for thread in voters + pollers:
+        thread.start()
+    for thread in voters:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for thread in pollers:
+        thread.join()
+
+    accepted = {option: sum(worker[option] for worker in per_worker) for option in OPTIONS}
+    expected = {option: before[option] + accepted[option] for option in OPTIONS}
+    # Batched or cached apps may need a moment to show the final counts
+    after = wait_for_totals(host, port, expected, settle)
+
+    return {
+        'votes_sent': votes,
+        'concurrency': concurrency,
+        'readers': readers,
+        'elapsed_s': round(elapsed, 2),
+        'vote': summarize(vote_stats, elapsed),
+        'results': summarize(results_stats, elapsed),
+        'votes_accepted': sum(accepted.values()),
+        'votes_counted': sum(after[option] - before[option] for option in OPTIONS),
+        'lost_votes': sum(expected[option] - after[option] for option in OPTIONS),
+    }
+
+def print_report(report):
+    """Human-readable report"""
+    print("\n" + "="*60)
+    print("📈 VOTE APP BENCHMARK")
+    print("="*60)
+    print(f"   {report['votes_sent']} votes, {report['concurrency']} voters, "
+          f"{report['readers']} results pollers, {report['elapsed_s']}s")
+    print()
+    print(f"   {'endpoint':<10} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name in ('vote', 'results'):
+        row = report[name]
+        print(f"   /{name:<9} {row['throughput_rps']:>9} {row['p50_ms']:>9} "
+              f"{row['p95_ms']:>9} {row['p99_ms']:>9} {row['errors']:>7}")
+    print()
+    print(f"   Votes accepted: {report['votes_accepted']}")
+    print(f"   Votes counted:  {report['votes_counted']}")
+    lost = report['lost_votes']
+    print(f"   {'✅' if lost == 0 else '❌'} Lost votes:    {lost}")
+
+def wait_for_http(host, port, path, timeout=30):
+    """Wait until `path` answers 200"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            status, _ = request(conn, 'GET', path)
+            conn.close()
+            if status == 200:
+                return True
+        except (OSError, http.client.HTTPException):
+            pass
+        time.sleep(0.5)
+    return False
+
+def start_redis(redis_port):
+    """Start a throwaway Redis: redis-server if installed, else Docker"""
+    if shutil.which('redis-server'):
+        process = subprocess.Popen(
+            ['redis-server', '--port', str(redis_port), '--save', '', '--appendonly', 'no'],
+            stdout=subprocess.DEVNULL,
+        )
+        return lambda: process.terminate()
+
+    if shutil.which('docker'):
+        name = f"vote-benchmark-redis-{redis_port}"
+        result = subprocess.run(
+            ['docker', 'run', '-d', '--rm', '--name', name, '-p', f'{redis_port}:6379', 'redis:alpine'],
+            capture_output=True, text=True,
+        )
+        if result.returncode == 0:
+            return lambda: subprocess.run(['docker', 'rm', '-f', name], capture_output=True)
+        print(f"❌ Could not start Redis container: {result.stderr.strip()}")
+        return None
+
+    print("❌ Need redis-server or Docker for --local mode")
+    return None
+
+def start_local_app(variant, redis_port, server_mode):
+    """Run <variant>/vote-app.py against the local Redis on port 8080"""
+    script = Path(__file__).parent / variant / 'vote-app.py'
+    if not script.exists():
+        print(f"❌ {script} not found")
+        return None
+
+    env = dict(os.environ, REDIS_HOST='localhost', REDIS_PORT=str(redis_port), SERVER_MODE=server_mode)
+    # Own process group so the Flask reloader child is stopped too
+    process = subprocess.Popen(
+        [sys.executable, str(script)], env=env, start_new_session=True,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+    def stop():
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait(timeout=30)
+        except (ProcessLookupError, subprocess.TimeoutExpired):
+            os.killpg(process.pid, signal.SIGKILL)
+    return stop
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the WFH vs WFO vote app")
+    parser.add_argument('--url', default='http://localhost:31004',
+                        help="Vote app to benchmark (ignored with --local)")
+    parser.add_argument('--local', metavar='VARIANT', choices=['hero-solution', 'simple-voting-app'],
+                        help="Start VARIANT/vote-app.py locally with a throwaway Redis")
+    parser.add_argument('--server-mode', default='production', choices=['production', 'development'],
+                        help="SERVER_MODE for --local (default: production)")
+    parser.add_argument('--redis-port', type=int, default=6390,
+                        help="Port for the throwaway Redis in --local mode")
+    parser.add_argument('--votes', type=int, default=2000, help="Total votes to cast")
+    parser.add_argument('--concurrency', type=int, default=20, help="Concurrent voters")
+    parser.add_argument('--readers', type=int, default=5, help="Concurrent /results pollers")
+    parser.add_argument('--settle', type=float, default=5.0,
+                        help="Seconds to wait for /results to catch up before counting lost votes")
+    parser.add_argument('--json', metavar='FILE', help="Also write the report as JSON")
+    args = parser.parse_args()
+
+    cleanups = []
+    try:
+        if args.local:
+            stop_redis = start_redis(args.redis_port)
+            if not stop_redis:
+                return False
+            cleanups.append(stop_redis)
+            stop_app = start_local_app(args.local, args.redis_port, args.server_mode)
+            if not stop_app:
+                return False
+            cleanups.append(stop_app)
+            host, port = 'localhost', LOCAL_APP_PORT
+            print(f"🚀 Started {args.local} ({args.server_mode}) on http://localhost:{port}")
+        else:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port or 80
+
+        if not wait_for_http(host, port, '/health'):
+            print(f"❌ Vote app at {host}:{port} is not healthy")
+            return False
+
+        report = run_benchmark(host, port, args.votes, args.concurrency, args.readers, args.settle)
+        report['target'] = args.local or args.url
+        print_report(report)
+
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"\n📝 Report written to {args.json}")
+        return True
+    finally:
+        for cleanup in reversed(cleanups):
+            cleanup()
+
+if __name__ == '__main__':
+    try:
+        sys.exit(0 if main() else 1)
+    except KeyboardInterrupt:
+        print("\n\n❌ Benchmark cancelled by user")
+        sys.exit(1)
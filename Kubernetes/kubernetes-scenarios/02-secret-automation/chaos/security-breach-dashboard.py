@@ -7,7 +7,7 @@ This dashboard visualizes what happens when you deploy with poor security practi
 Educational demonstration of security anti-patterns.
 """
 
-from flask import Flask, render_template_string, jsonify
+from flask import Flask, jsonify
 import subprocess
 import json
 import base64
@@ -481,10 +481,13 @@ HTML_TEMPLATE = """
 </html>
 """
 
+# The dashboard page has no per-request data, so render it once
+DASHBOARD_HTML = app.jinja_env.from_string(HTML_TEMPLATE).render()
+
 @app.route('/')
 def index():
     """Serve the breach dashboard"""
-    return render_template_string(HTML_TEMPLATE)
+    return DASHBOARD_HTML
 
 @app.route('/api/secrets')
 def get_secrets():
@@ -1,14 +1,22 @@
 #!/usr/bin/env python3
 """
-Simple Secure Todo App with SQLite
+Simple Secure Todo App with SQLite (or PostgreSQL)
 Demonstrates Kubernetes secret management without complex database
 
 Secure Todo App for Kubernetes secret management demo.
 """
-from flask import Flask, render_template_string, request, jsonify
+from flask import Flask, request, jsonify
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from urllib.parse import quote
 import sqlite3
 import os
+import gzip
+import queue
+import hashlib
 import secrets
+import threading
 
 app = Flask(__name__)
 
@@ -16,28 +24,405 @@ app = Flask(__name__)
 API_KEY = os.getenv('API_KEY', 'default-key')
 APP_SECRET = os.getenv('APP_SECRET', 'default-secret')
 
+# Storage backend: 'sqlite' keeps todos in a pod-local file (one replica),
+# 'postgres' shares them so the Deployment can scale out. A DATABASE_URL,
+# e.g. from a Secret, selects postgres unless DB_BACKEND says otherwise.
+DATABASE_URL = os.getenv('DATABASE_URL')
+DB_BACKEND = os.getenv('DB_BACKEND', 'postgres' if DATABASE_URL else 'sqlite')
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 8))
+
 # SQLite database
 DB_FILE = '/tmp/todos.db'
+# How long a write waits for another writer's lock before giving up
+DB_BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', 5000))
 
-def init_db():
-    """Initialize database"""
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS todos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            task TEXT NOT NULL,
-            completed INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+# PostgreSQL connection (password populated from Kubernetes Secret)
+DB_HOST = os.getenv('DB_HOST', 'localhost')
+DB_PORT = int(os.getenv('DB_PORT', 5432))
+DB_NAME = os.getenv('DB_NAME', 'todos')
+DB_USER = os.getenv('DB_USER', 'todo')
+DB_PASSWORD = os.getenv('DB_PASSWORD', '')
+
+# Rows serialized per chunk when streaming a todo list
+STREAM_CHUNK_ROWS = 200
+
+def todos_query(select, placeholder, completed, after, limit):
+    """Newest-first SELECT for the filters, in the backend's paramstyle"""
+    clauses, params = [], []
+    if completed is not None:
+        clauses.append(f"completed = {placeholder}")
+        params.append(completed)
+    if after is not None:
+        clauses.append(f"(created_at, id) < ({placeholder}, {placeholder})")
+        params.extend(after)
+
+    sql = select
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY created_at DESC, id DESC"
+    if limit is not None:
+        sql += f" LIMIT {placeholder}"
+        params.append(limit)
+    return sql, params
+
+class TodoRepository(ABC):
+    """Storage operations behind the todo API; one subclass per database
+
+    Todos are dicts with id, task, completed and created_at (a
+    'YYYY-MM-DD HH:MM:SS' string, UTC). version() changes after every
+    committed write and is what the response cache and ETags key on.
+    """
+
+    # Exceptions meaning "database busy or unreachable" (answered with 503)
+    unavailable_errors = ()
+
+    @abstractmethod
+    def connection(self):
+        """Context manager lending one pooled connection"""
+
+    @abstractmethod
+    def init_schema(self):
+        """Create the todos table if it is missing"""
+
+    @abstractmethod
+    def iter_todos(self, completed=None, after=None, limit=None):
+        """Yield todos newest-first; the connection is held while iterating"""
+
+    @abstractmethod
+    def counts(self):
+        """(total, completed) over all todos"""
+
+    @abstractmethod
+    def add(self, task):
+        """Insert one todo, returns its id"""
+
+    @abstractmethod
+    def add_many(self, tasks):
+        """Insert todos in one transaction, returns their ids in order"""
+
+    @abstractmethod
+    def complete(self, todo_id):
+        """Mark one todo completed"""
+
+    @abstractmethod
+    def delete(self, todo_id):
+        """Delete one todo"""
+
+    @abstractmethod
+    def complete_many(self, ids):
+        """Complete todos in one transaction, returns the ids that existed"""
+
+    @abstractmethod
+    def delete_many(self, ids):
+        """Delete todos in one transaction, returns the ids that existed"""
+
+    @abstractmethod
+    def version(self):
+        """Opaque token that changes after every committed write"""
+
+    def ping(self):
+        """Cheap round trip on a pooled connection; raises when unreachable"""
+        with self.connection() as conn:
+            conn.cursor().execute("SELECT 1")
+
+class SQLiteTodoRepository(TodoRepository):
+    """Todos in a local SQLite file, with pooled WAL-mode connections"""
+
+    unavailable_errors = (sqlite3.OperationalError,)
+
+    # SQL kept as constants so each pooled connection's statement cache
+    # reuses the prepared statements across requests
+    SELECT_TODOS = "SELECT id, task, completed, created_at FROM todos"
+    INSERT_TODO = "INSERT INTO todos (task) VALUES (?)"
+    COMPLETE_TODO = "UPDATE todos SET completed = 1 WHERE id = ?"
+    DELETE_TODO = "DELETE FROM todos WHERE id = ?"
+    SELECT_TODO_SEQUENCE = "SELECT seq FROM sqlite_sequence WHERE name = 'todos'"
+    COUNT_TODOS = "SELECT COUNT(*), COALESCE(SUM(completed), 0) FROM todos"
+
+    def __init__(self, path, size):
+        self.path = path
+        self.idle = queue.LifoQueue()
+        for _ in range(size):
+            self.idle.put(None)  # opened lazily on first use
+        # The file is pod-local, so a per-process counter is enough; the
+        # boot id keeps versions from a previous run from matching
+        self.boot_id = secrets.token_hex(4)
+        self.writes = 0
+        self.writes_lock = threading.Lock()
+
+    def _open(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=DB_BUSY_TIMEOUT_MS / 1000,
+            cached_statements=128,
+            # Safe: the pool never hands one connection to two threads
+            check_same_thread=False,
         )
-    """)
-    conn.commit()
-    conn.close()
-    print(f"✅ Database initialized at {DB_FILE}")
-    print(f"✅ API Key loaded: {API_KEY[:8]}...")
-    print(f"✅ App Secret loaded: {APP_SECRET[:8]}...")
+        conn.row_factory = sqlite3.Row
+        # WAL lets readers carry on while a write is in progress;
+        # NORMAL only fsyncs at checkpoints, which is safe with WAL
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commits on success, rolls back on error"""
+        conn = self.idle.get()
+        try:
+            if conn is None:
+                conn = self._open()
+            with conn:
+                yield conn
+        finally:
+            self.idle.put(conn)
+
+    @contextmanager
+    def write(self):
+        """Connection for a write; bumps the version once it has committed"""
+        with self.connection() as conn:
+            yield conn
+        # += isn't atomic; a lost increment would repeat a version (and ETag)
+        with self.writes_lock:
+            self.writes += 1
+
+    def init_schema(self):
+        with self.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS todos (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    task TEXT NOT NULL,
+                    completed INTEGER DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            # Keyset pagination walks these newest-first, with or without
+            # the completed filter, instead of sorting the whole table
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_todos_completed_created
+                ON todos (completed, created_at, id)
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_todos_created
+                ON todos (created_at, id)
+            """)
+        print(f"✅ Database initialized at {self.path} (SQLite WAL, pool of {DB_POOL_SIZE})")
+
+    def iter_todos(self, completed=None, after=None, limit=None):
+        sql, params = todos_query(self.SELECT_TODOS, '?', completed, after, limit)
+        with self.connection() as conn:
+            for row in conn.execute(sql, params):
+                yield dict(row)
+
+    def counts(self):
+        with self.connection() as conn:
+            total, completed = conn.execute(self.COUNT_TODOS).fetchone()
+        return total, completed
+
+    def add(self, task):
+        with self.write() as conn:
+            return conn.execute(self.INSERT_TODO, (task,)).lastrowid
+
+    def add_many(self, tasks):
+        with self.write() as conn:
+            # Take the write lock up front so nobody else can claim ids
+            # between reading the AUTOINCREMENT counter and inserting
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(self.SELECT_TODO_SEQUENCE).fetchone()
+            conn.executemany(self.INSERT_TODO, [(task,) for task in tasks])
+        first_id = (row['seq'] if row else 0) + 1
+        return list(range(first_id, first_id + len(tasks)))
+
+    def complete(self, todo_id):
+        with self.write() as conn:
+            conn.execute(self.COMPLETE_TODO, (todo_id,))
+
+    def delete(self, todo_id):
+        with self.write() as conn:
+            conn.execute(self.DELETE_TODO, (todo_id,))
+
+    def _update_many(self, statement, ids):
+        with self.write() as conn:
+            # Write lock first, so the ids we report stay valid until commit
+            conn.execute("BEGIN IMMEDIATE")
+            placeholders = ','.join('?' * len(ids))
+            found = {row['id'] for row in conn.execute(f"SELECT id FROM todos WHERE id IN ({placeholders})", ids)}
+            conn.executemany(statement, [(i,) for i in found])
+        return found
+
+    def complete_many(self, ids):
+        return self._update_many(self.COMPLETE_TODO, ids)
+
+    def delete_many(self, ids):
+        return self._update_many(self.DELETE_TODO, ids)
+
+    def version(self):
+        return f"{self.boot_id}-{self.writes}"
+
+class PostgresTodoRepository(TodoRepository):
+    """Todos in a shared PostgreSQL database, with a thread-safe pool"""
+
+    SELECT_TODOS = (
+        "SELECT id, task, completed,"
+        " to_char(created_at, 'YYYY-MM-DD HH24:MI:SS') AS created_at FROM todos"
+    )
+    INSERT_TODO = "INSERT INTO todos (task) VALUES (%s) RETURNING id"
+    INSERT_TODOS = "INSERT INTO todos (task) VALUES %s RETURNING id"
+    COMPLETE_TODOS = "UPDATE todos SET completed = 1 WHERE id = ANY(%s) RETURNING id"
+    DELETE_TODOS = "DELETE FROM todos WHERE id = ANY(%s) RETURNING id"
+    COUNT_TODOS = "SELECT COUNT(*), COALESCE(SUM(completed), 0) FROM todos"
+    # Replicas share the data, so the version lives in the database and is
+    # bumped in the same transaction as every write
+    BUMP_VERSION = "UPDATE todo_changes SET version = version + 1 WHERE id = 1"
+    SELECT_VERSION = "SELECT epoch, version FROM todo_changes WHERE id = 1"
+
+    def __init__(self, size):
+        import psycopg2
+        import psycopg2.extras
+        import psycopg2.pool
+
+        self.extras = psycopg2.extras
+        self.unavailable_errors = (psycopg2.OperationalError, psycopg2.pool.PoolError)
+        connect_args = {'dsn': DATABASE_URL} if DATABASE_URL else {
+            'host': DB_HOST,
+            'port': DB_PORT,
+            'dbname': DB_NAME,
+            'user': DB_USER,
+            'password': DB_PASSWORD,
+        }
+        # minconn=0: nothing connects until the first request, so pods can
+        # start before the database Service accepts connections
+        self.pool = psycopg2.pool.ThreadedConnectionPool(0, size, connect_timeout=5, **connect_args)
+        # ThreadedConnectionPool raises when exhausted; make callers wait
+        self.slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commits on success, rolls back on error"""
+        with self.slots:
+            conn = self.pool.getconn()
+            try:
+                with conn:
+                    yield conn
+            finally:
+                self.pool.putconn(conn, close=bool(conn.closed))
+
+    def init_schema(self):
+        with self.connection() as conn, conn.cursor() as cur:
+            # Replicas start together; let one of them create the schema
+            cur.execute("SELECT pg_advisory_xact_lock(20240502)")
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS todos (
+                    id BIGSERIAL PRIMARY KEY,
+                    task TEXT NOT NULL,
+                    completed INTEGER DEFAULT 0,
+                    created_at TIMESTAMP(0) DEFAULT (now() AT TIME ZONE 'UTC')
+                )
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_todos_completed_created
+                ON todos (completed, created_at, id)
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_todos_created
+                ON todos (created_at, id)
+            """)
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS todo_changes (
+                    id INTEGER PRIMARY KEY,
+                    epoch TEXT NOT NULL,
+                    version BIGINT NOT NULL
+                )
+            """)
+            cur.execute("""
+                INSERT INTO todo_changes (id, epoch, version)
+                VALUES (1, md5(random()::text), 0)
+                ON CONFLICT (id) DO NOTHING
+            """)
+        where = 'DATABASE_URL' if DATABASE_URL else f"{DB_HOST}:{DB_PORT}/{DB_NAME}"
+        print(f"✅ Database initialized at {where} (PostgreSQL, pool of {DB_POOL_SIZE})")
+
+    def iter_todos(self, completed=None, after=None, limit=None):
+        sql, params = todos_query(self.SELECT_TODOS, '%s', completed, after, limit)
+        with self.connection() as conn:
+            # Server-side cursor: rows arrive in chunks as they are sent on
+            with conn.cursor('todos_stream', cursor_factory=self.extras.RealDictCursor) as cur:
+                cur.itersize = STREAM_CHUNK_ROWS
+                cur.execute(sql, params)
+                for row in cur:
+                    yield dict(row)
+
+    def _write(self, sql, params, fetch_all=False):
+        with self.connection() as conn, conn.cursor() as cur:
+            if fetch_all:
+                rows = self.extras.execute_values(cur, sql, params, fetch=True)
+            else:
+                cur.execute(sql, params)
+                rows = cur.fetchall()
+            cur.execute(self.BUMP_VERSION)
+        return [row[0] for row in rows]
+
+    def counts(self):
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(self.COUNT_TODOS)
+            total, completed = cur.fetchone()
+        return total, completed
+
+    def add(self, task):
+        return self._write(self.INSERT_TODO, (task,))[0]
+
+    def add_many(self, tasks):
+        return self._write(self.INSERT_TODOS, [(task,) for task in tasks], fetch_all=True)
+
+    def complete(self, todo_id):
+        self.complete_many([todo_id])
+
+    def delete(self, todo_id):
+        self.delete_many([todo_id])
+
+    def complete_many(self, ids):
+        return set(self._write(self.COMPLETE_TODOS, (ids,)))
+
+    def delete_many(self, ids):
+        return set(self._write(self.DELETE_TODOS, (ids,)))
+
+    def version(self):
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(self.SELECT_VERSION)
+            epoch, version = cur.fetchone()
+        return f"{epoch[:8]}-{version}"
+
+def create_repository():
+    """Repository for DB_BACKEND"""
+    if DB_BACKEND == 'postgres':
+        return PostgresTodoRepository(DB_POOL_SIZE)
+    if DB_BACKEND == 'sqlite':
+        return SQLiteTodoRepository(DB_FILE, DB_POOL_SIZE)
+    raise ValueError(f"Unknown DB_BACKEND '{DB_BACKEND}' (use 'sqlite' or 'postgres')")
+
+repository = create_repository()
+print(f"✅ API Key loaded: {API_KEY[:8]}...")
+print(f"✅ App Secret loaded: {APP_SECRET[:8]}...")
 
-init_db()
+database_ready = False
+database_ready_lock = threading.Lock()
+
+def init_db():
+    """Create the schema once the database answers; True when it is usable"""
+    global database_ready
+    if database_ready:
+        return True
+    with database_ready_lock:
+        if database_ready:
+            return True
+        try:
+            repository.init_schema()
+        except repository.unavailable_errors as e:
+            print(f"⏳ Database not ready yet: {e}")
+            return False
+        database_ready = True
+        return True
 
 TODO_TEMPLATE = """
 <!DOCTYPE html>
@@ -280,37 +665,64 @@ TODO_TEMPLATE = """
             setTimeout(() => { msg.style.display = 'none'; }, 3000);
         }
 
-        function updateStats(todos) {
-            const total = todos.length;
-            const completed = todos.filter(t => t.completed).length;
-            const pending = total - completed;
+        // The list is fetched a page at a time; refreshes re-read as many
+        // rows as are on screen (up to the API's 500-row limit)
+        const PAGE_SIZE = 50;
+        const MAX_PAGE = 500;
+        let todos = [];
+        let nextCursor = null;
+
+        function updateStats() {
+            fetch('/api/todos/stats')
+            .then(response => response.json())
+            .then(stats => {
+                document.getElementById('totalTasks').textContent = stats.total;
+                document.getElementById('completedTasks').textContent = stats.completed;
+                document.getElementById('pendingTasks').textContent = stats.pending;
+            });
+        }
+
+        function fetchPage(limit, after) {
+            const query = `limit=${limit}` + (after ? `&after=${after}` : '');
+            return fetch(`/api/todos?${query}`)
+            .then(response => response.json().then(page => {
+                nextCursor = response.headers.get('X-Next-Cursor');
+                return page;
+            }));
+        }
+
+        function renderTodos() {
+            const list = document.getElementById('todoList');
 
-            document.getElementById('totalTasks').textContent = total;
-            document.getElementById('completedTasks').textContent = completed;
-            document.getElementById('pendingTasks').textContent = pending;
+            if (todos.length === 0) {
+                list.innerHTML = '<li class="empty-state">📝 No tasks yet. Add one above!</li>';
+                return;
+            }
+
+            list.innerHTML = todos.map(todo => `
+                <li class="todo-item ${todo.completed ? 'completed' : ''}">
+                    <span class="todo-text">${todo.task}</span>
+                    <div class="todo-actions">
+                        ${!todo.completed ? `<button class="btn btn-complete" onclick="completeTodo(${todo.id})">✓ Done</button>` : ''}
+                        <button class="btn btn-delete" onclick="deleteTodo(${todo.id})">🗑️</button>
+                    </div>
+                </li>
+            `).join('') + (nextCursor ? '<li class="empty-state"><button class="btn" onclick="loadMore()">⬇️ Load more</button></li>' : '');
         }
 
         function loadTodos() {
-            fetch('/api/todos')
-            .then(response => response.json())
-            .then(todos => {
-                const list = document.getElementById('todoList');
-                updateStats(todos);
-
-                if (todos.length === 0) {
-                    list.innerHTML = '<li class="empty-state">📝 No tasks yet. Add one above!</li>';
-                    return;
-                }
-
-                list.innerHTML = todos.map(todo => `
-                    <li class="todo-item ${todo.completed ? 'completed' : ''}">
-                        <span class="todo-text">${todo.task}</span>
-                        <div class="todo-actions">
-                            ${!todo.completed ? `<button class="btn btn-complete" onclick="completeTodo(${todo.id})">✓ Done</button>` : ''}
-                            <button class="btn btn-delete" onclick="deleteTodo(${todo.id})">🗑️</button>
-                        </div>
-                    </li>
-                `).join('');
+            const limit = Math.min(Math.max(PAGE_SIZE, todos.length), MAX_PAGE);
+            fetchPage(limit).then(page => {
+                todos = page;
+                renderTodos();
+            });
+            updateStats();
+        }
+
+        function loadMore() {
+            fetchPage(PAGE_SIZE, nextCursor).then(page => {
+                todos = todos.concat(page);
+                renderTodos();
             });
         }
 
@@ -356,62 +768,319 @@ TODO_TEMPLATE = """
 </html>
 """
 
+# Browsers and proxies may reuse the page this long before revalidating;
+# the ETag changes whenever a deploy changes the HTML
+PAGE_MAX_AGE = int(os.getenv('PAGE_MAX_AGE', 300))
+
+class StaticPage:
+    """A template rendered once at startup and served from memory, gzipped
+    for clients that accept it"""
+
+    def __init__(self, template):
+        self.body = app.jinja_env.from_string(template).render().encode()
+        self.gzipped = gzip.compress(self.body, compresslevel=9, mtime=0)
+        self.etag = hashlib.sha1(self.body).hexdigest()
+
+    def response(self):
+        gzipped = 'gzip' in request.accept_encodings
+        response = app.response_class(self.gzipped if gzipped else self.body, mimetype='text/html')
+        if gzipped:
+            response.content_encoding = 'gzip'
+        # Each encoding is a different representation, so it gets its own ETag
+        response.set_etag(self.etag + ('-gz' if gzipped else ''))
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.max_age = PAGE_MAX_AGE
+        return response.make_conditional(request)
+
+todo_page = StaticPage(TODO_TEMPLATE)
+
 @app.route('/')
 def index():
-    return render_template_string(TODO_TEMPLATE)
+    return todo_page.response()
+
+TODOS_PAGE_MAX = 500
+
+def parse_todo_filters(args):
+    """Validate ?completed=, ?after=<created_at>,<id> and ?limit=
+
+    Raises ValueError with a message for the client on bad input.
+    """
+    completed = args.get('completed')
+    if completed is not None:
+        if completed.lower() in ('1', 'true'):
+            completed = 1
+        elif completed.lower() in ('0', 'false'):
+            completed = 0
+        else:
+            raise ValueError("completed must be true or false")
+
+    after = args.get('after')
+    if after is not None:
+        created_at, _, todo_id = after.rpartition(',')
+        if not created_at or not todo_id.isdigit():
+            raise ValueError("after must be <created_at>,<id>")
+        after = (created_at, int(todo_id))
+
+    limit = args.get('limit')
+    if limit is not None:
+        if not limit.isdigit() or not 1 <= int(limit) <= TODOS_PAGE_MAX:
+            raise ValueError(f"limit must be between 1 and {TODOS_PAGE_MAX}")
+        limit = int(limit)
+
+    return completed, after, limit
+
+def stream_json_array(rows):
+    """Serialize rows as one JSON array, a chunk at a time"""
+    yield '['
+    chunk = []
+    first = True
+    for row in rows:
+        chunk.append(('' if first else ',') + app.json.dumps(row))
+        first = False
+        if len(chunk) >= STREAM_CHUNK_ROWS:
+            yield ''.join(chunk)
+            chunk = []
+    chunk.append(']')
+    yield ''.join(chunk)
+
+# Serialized GET /api/todos responses, keyed by filters; 0 disables caching
+TODOS_CACHE_ENTRIES = int(os.getenv('TODOS_CACHE_ENTRIES', 64))
+
+class TodoListCache:
+    """Response bodies per filter set, valid until the next write
+
+    Entries are tagged with the repository version, which changes after
+    every committed write, so one write invalidates them all. ETags
+    combine that version with the filters, so a client can be answered 304
+    without reading the list.
+    """
+
+    def __init__(self, max_entries, current_version):
+        self.max_entries = max_entries
+        self.current_version = current_version
+        self.entries_version = None
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def etag(self, filters, version):
+        digest = hashlib.sha1(repr(filters).encode()).hexdigest()[:16]
+        return f"{version}-{digest}"
+
+    def get(self, filters, version):
+        """(body, headers) cached for this version, or None"""
+        with self.lock:
+            entry = self.entries.get(filters) if version == self.entries_version else None
+            if entry is None:
+                return None
+            self.entries.move_to_end(filters)
+            return entry
+
+    def put(self, filters, version, body, headers):
+        # A write landed while this body was being built: it may be stale
+        if not self.max_entries or version != self.current_version():
+            return
+        with self.lock:
+            if version != self.entries_version:
+                self.entries.clear()
+                self.entries_version = version
+            self.entries[filters] = (body, headers)
+            self.entries.move_to_end(filters)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def tee(self, filters, version, chunks):
+        """Pass a streamed body through, caching it once fully sent"""
+        sent = []
+        for chunk in chunks:
+            sent.append(chunk)
+            yield chunk
+        self.put(filters, version, ''.join(sent), {})
+
+todo_cache = TodoListCache(TODOS_CACHE_ENTRIES, repository.version)
 
 @app.route('/api/todos', methods=['GET'])
 def get_todos():
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM todos ORDER BY created_at DESC")
-    todos = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-    return jsonify(todos)
+    try:
+        filters = parse_todo_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    version = repository.version()
+    etag = todo_cache.etag(filters, version)
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = build_todos_response(filters, version)
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
+def build_todos_response(filters, version):
+    """Todo list response from the cache, or from the database on a miss"""
+    cached = todo_cache.get(filters, version)
+    if cached:
+        body, headers = cached
+        return app.response_class(body, mimetype='application/json', headers=headers)
+
+    completed, after, limit = filters
+
+    if limit is None:
+        # Whole list: stream rows straight from the cursor
+        rows = repository.iter_todos(completed, after)
+        body = todo_cache.tee(filters, version, stream_json_array(rows))
+        return app.response_class(body, mimetype='application/json')
+
+    # One extra row only tells us whether another page exists
+    rows = list(repository.iter_todos(completed, after, limit + 1))
+
+    body = ''.join(stream_json_array(rows[:limit]))
+    headers = {}
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        headers['X-Next-Cursor'] = quote(f"{last['created_at']},{last['id']}")
+    todo_cache.put(filters, version, body, headers)
+    return app.response_class(body, mimetype='application/json', headers=headers)
+
+@app.route('/api/todos/stats')
+def get_todo_stats():
+    """Total, completed and pending counts, so the UI can page the list"""
+    version = repository.version()
+    etag = todo_cache.etag('stats', version)
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        cached = todo_cache.get('stats', version)
+        if cached:
+            body = cached[0]
+        else:
+            total, completed = repository.counts()
+            body = app.json.dumps({'total': total, 'completed': completed, 'pending': total - completed})
+            todo_cache.put('stats', version, body, {})
+        response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
 
 @app.route('/api/todos', methods=['POST'])
 def add_todo():
     data = request.get_json()
     task = data.get('task')
 
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO todos (task) VALUES (?)", (task,))
-    conn.commit()
-    todo_id = cursor.lastrowid
-    conn.close()
+    todo_id = repository.add(task)
 
     return jsonify({'id': todo_id, 'task': task, 'completed': False})
 
 @app.route('/api/todos/<int:todo_id>/complete', methods=['PUT'])
 def complete_todo(todo_id):
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    cursor.execute("UPDATE todos SET completed = 1 WHERE id = ?", (todo_id,))
-    conn.commit()
-    conn.close()
+    repository.complete(todo_id)
 
     return jsonify({'success': True})
 
 @app.route('/api/todos/<int:todo_id>', methods=['DELETE'])
 def delete_todo(todo_id):
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM todos WHERE id = ?", (todo_id,))
-    conn.commit()
-    conn.close()
+    repository.delete(todo_id)
 
     return jsonify({'success': True})
 
+TODOS_BULK_MAX = 500
+
+def bulk_items(data, key):
+    """The list under data[key], or None if the body is not a usable batch"""
+    items = data.get(key) if isinstance(data, dict) else None
+    if not isinstance(items, list) or not 1 <= len(items) <= TODOS_BULK_MAX:
+        return None
+    return items
+
+def is_todo_id(value):
+    """JSON integers only: bool is an int subclass, but true is not todo 1"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def bulk_update(update_many, ids):
+    """Apply update_many to the valid ids in one transaction, per-id results"""
+    valid = sorted({i for i in ids if is_todo_id(i)})
+    found = update_many(valid) if valid else set()
+
+    results = []
+    for todo_id in ids:
+        if is_todo_id(todo_id) and todo_id in found:
+            results.append({'id': todo_id, 'success': True})
+        else:
+            error = 'not found' if is_todo_id(todo_id) else 'id must be an integer'
+            results.append({'id': todo_id, 'success': False, 'error': error})
+    return results
+
+@app.route('/api/todos/bulk', methods=['POST'])
+def bulk_add_todos():
+    """Add many todos in one transaction: {"tasks": ["...", ...]}"""
+    tasks = bulk_items(request.get_json(silent=True), 'tasks')
+    if tasks is None:
+        return jsonify({'error': f'Send {{"tasks": [...]}} with 1-{TODOS_BULK_MAX} items'}), 400
+
+    valid = [task for task in tasks if isinstance(task, str) and task.strip()]
+    new_ids = iter(repository.add_many(valid) if valid else [])
+
+    results = []
+    for task in tasks:
+        if isinstance(task, str) and task.strip():
+            results.append({'id': next(new_ids), 'task': task, 'completed': False, 'success': True})
+        else:
+            results.append({'task': task, 'success': False, 'error': 'task must be a non-empty string'})
+    return jsonify({'results': results})
+
+@app.route('/api/todos/bulk/complete', methods=['PUT'])
+def bulk_complete_todos():
+    """Complete many todos in one transaction: {"ids": [1, 2, ...]}"""
+    ids = bulk_items(request.get_json(silent=True), 'ids')
+    if ids is None:
+        return jsonify({'error': f'Send {{"ids": [...]}} with 1-{TODOS_BULK_MAX} items'}), 400
+    return jsonify({'results': bulk_update(repository.complete_many, ids)})
+
+@app.route('/api/todos/bulk', methods=['DELETE'])
+def bulk_delete_todos():
+    """Delete many todos in one transaction: {"ids": [1, 2, ...]}"""
+    ids = bulk_items(request.get_json(silent=True), 'ids')
+    if ids is None:
+        return jsonify({'error': f'Send {{"ids": [...]}} with 1-{TODOS_BULK_MAX} items'}), 400
+    return jsonify({'results': bulk_update(repository.delete_many, ids)})
+
+def database_unavailable(error):
+    # Lock wait past the busy timeout, or the database is unreachable
+    print(f"⚠️  Database error: {error}")
+    return jsonify({'error': 'Database busy, try again'}), 503
+
+for database_error in repository.unavailable_errors:
+    app.register_error_handler(database_error, database_unavailable)
+
+@app.before_request
+def require_database():
+    # The database may still be starting (it is deployed alongside the app)
+    if request.path.startswith('/api/') and not init_db():
+        return jsonify({'error': 'Database unavailable'}), 503
+
 @app.route('/health')
 def health():
+    # Readiness: keeps the pod out of the Service until the database answers
+    ready = init_db()
+    if ready:
+        try:
+            repository.ping()
+        except repository.unavailable_errors:
+            ready = False
+    if not ready:
+        return jsonify({'status': 'degraded', 'database': DB_BACKEND, 'reachable': False}), 503
     return jsonify({
         'status': 'healthy',
+        'database': DB_BACKEND,
         'secrets_loaded': bool(API_KEY and APP_SECRET),
         'api_key_preview': API_KEY[:8] + '...'
     })
 
+@app.route('/health/live')
+def health_live():
+    # Liveness: the process is up, whatever the database is doing
+    return jsonify({'status': 'alive'})
+
 if __name__ == '__main__':
     print("🔐 Starting Secure Todo App...")
     print(f"✅ API Key: {API_KEY[:12]}...")
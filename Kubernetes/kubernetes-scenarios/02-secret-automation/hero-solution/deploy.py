@@ -7,10 +7,15 @@ import os
 import sys
 import subprocess
 import time
+import base64
 import secrets
 import string
 from pathlib import Path
 
+# Shared helpers live next to the scenario folders
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from image_registry import pushed_image_reference
+
 def run_command(cmd, description, check=True):
     """Run a command and print output"""
     print(f"\n{'='*60}")
@@ -32,6 +37,16 @@ def generate_secure_password(length=32):
     alphabet = string.ascii_letters + string.digits + "!@#$%^&*"
     return ''.join(secrets.choice(alphabet) for _ in range(length))
 
+def existing_secret_value(key):
+    """Decoded value of `key` in the deployed app-secrets Secret, or None"""
+    result = subprocess.run(
+        f"kubectl get secret app-secrets -n secure-todo -o jsonpath='{{.data.{key}}}'",
+        shell=True, capture_output=True, text=True
+    )
+    if result.returncode != 0 or not result.stdout.strip():
+        return None
+    return base64.b64decode(result.stdout.strip()).decode()
+
 def detect_environment():
     """Detect Kubernetes environment"""
     print("\n🔍 Detecting Kubernetes environment...")
@@ -84,11 +99,17 @@ def main():
     print("\n🔐 Generating secure credentials...")
     api_key = generate_secure_password(32)
     app_secret = generate_secure_password(32)
-    db_password = generate_secure_password(32)
+    # PostgreSQL only reads its password when it initializes its data, so
+    # a redeploy must keep the one the running database already has
+    db_password = existing_secret_value('db-password')
+    reused_db_password = db_password is not None
+    if not reused_db_password:
+        db_password = generate_secure_password(32)
     print("✅ Generated cryptographically secure secrets")
     print(f"   API Key: {api_key[:12]}... (32 chars)")
     print(f"   App Secret: {app_secret[:12]}... (32 chars)")
-    print(f"   DB Password: {db_password[:12]}... (32 chars)")
+    print(f"   DB Password: {db_password[:12]}... "
+          + ("(kept from the existing Secret)" if reused_db_password else "(32 chars)"))
 
     # Build Docker image
     image_name = "secure-todo:latest"
@@ -109,8 +130,24 @@ def main():
         if not run_command(build_cmd, f"Build {version} Docker image"):
             return False
 
+    # Push to the local registry started by universal-setup.py
+    # (SETUP_LOCAL_REGISTRY=1); nodes then pull only the layers they lack.
+    # Deployed by digest: with a plain tag and IfNotPresent, nodes that
+    # already have the tag would keep the old image after a rebuild
+    registry = os.getenv('WORKSHOP_REGISTRY')
+    if registry:
+        print(f"\n📦 Pushing image to {registry}...")
+        if not run_command(
+            f"docker tag {image_name} {registry}/{image_name} && docker push {registry}/{image_name}",
+            "Push image to local registry"
+        ):
+            return False
+        image_name = pushed_image_reference(f"{registry}/{image_name}")
+        if not image_name:
+            print("\n❌ Could not read the pushed image's digest")
+            return False
     # Load into Kind if needed
-    if env == "kind":
+    elif env == "kind":
         print("\n📦 Loading image into Kind cluster...")
         run_command(f"kind load docker-image {image_name}", "Load image into Kind", check=False)
 
@@ -122,6 +159,15 @@ def main():
     # Replace secrets
     manifest = manifest.replace('GENERATED_BY_SCRIPT', api_key, 1)
     manifest = manifest.replace('GENERATED_BY_SCRIPT', app_secret, 1)
+    manifest = manifest.replace('GENERATED_BY_SCRIPT', db_password, 1)
+
+    # Storage backend: export DB_BACKEND=postgres for a shared database
+    # that lets the Deployment scale beyond one replica's local SQLite file
+    db_backend = os.getenv('DB_BACKEND', 'sqlite')
+    manifest = manifest.replace(
+        'name: DB_BACKEND\n          value: "sqlite"',
+        f'name: DB_BACKEND\n          value: "{db_backend}"'
+    )
 
     # Add DB_PASSWORD if enhanced version
     if version == "enhanced" and 'db-password' not in manifest:
@@ -137,10 +183,13 @@ def main():
     with open('k8s-deployed.yaml', 'w') as f:
         f.write(manifest)
 
-    print(f"✅ Manifest updated for {version} version")
+    print(f"✅ Manifest updated for {version} version ({db_backend} storage)")
 
     # Deploy
-    if not run_command("kubectl apply -f k8s-deployed.yaml", "Deploy to Kubernetes"):
+    apply_cmd = "kubectl apply -f k8s-deployed.yaml"
+    if db_backend == "postgres":
+        apply_cmd += " -f k8s-postgres.yaml"
+    if not run_command(apply_cmd, "Deploy to Kubernetes"):
         return False
 
     # Wait for pods
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the Secure Todo App bulk API
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+
+os.environ['DB_BACKEND'] = 'sqlite'
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app as todo_app
+
+
+class TestBulkUpdate(unittest.TestCase):
+    """bulk_update only passes real integer ids to the repository"""
+
+    def test_booleans_are_not_ids(self):
+        """true/false are rejected instead of matching todos 1 and 0"""
+        received = []
+
+        def update_many(ids):
+            received.extend(ids)
+            return set(ids)
+
+        results = todo_app.bulk_update(update_many, [True, 1, False, 'x'])
+
+        self.assertEqual(received, [1])
+        self.assertEqual(results, [
+            {'id': True, 'success': False, 'error': 'id must be an integer'},
+            {'id': 1, 'success': True},
+            {'id': False, 'success': False, 'error': 'id must be an integer'},
+            {'id': 'x', 'success': False, 'error': 'id must be an integer'},
+        ])
+
+
+class TestBulkRoutes(unittest.TestCase):
+    """Bulk endpoints against a throwaway SQLite file"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.original = todo_app.repository, todo_app.todo_cache
+        todo_app.repository = todo_app.SQLiteTodoRepository(os.path.join(self.tmpdir.name, 'todos.db'), 2)
+        todo_app.todo_cache = todo_app.TodoListCache(0, todo_app.repository.version)
+        todo_app.database_ready = False
+        self.client = todo_app.app.test_client()
+
+    def tearDown(self):
+        todo_app.repository, todo_app.todo_cache = self.original
+        todo_app.database_ready = False
+        self.tmpdir.cleanup()
+
+    def test_bulk_complete_ignores_boolean_ids(self):
+        """{"ids": [true]} must not complete todo 1"""
+        response = self.client.post('/api/todos/bulk', json={'tasks': ['first']})
+        self.assertEqual(response.get_json()['results'][0]['id'], 1)
+
+        response = self.client.put('/api/todos/bulk/complete', json={'ids': [True]})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.get_json()['results'][0]['success'])
+
+        todos = self.client.get('/api/todos').get_json()
+        self.assertFalse(todos[0]['completed'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,16 +5,19 @@ Simple Flask app that displays version information
 
 Blue-Green Deployment Demo App
 """
-from flask import Flask, jsonify, render_template_string
+from flask import Flask, jsonify, render_template, request
 import os
+import gzip
 import socket
+import hashlib
 
 app = Flask(__name__)
 
 # Get version from environment variable
 VERSION = os.getenv('VERSION', 'unknown')
 COLOR = os.getenv('COLOR', 'gray')
-POD_NAME = os.getenv('POD_NAME', socket.gethostname())
+HOSTNAME = socket.gethostname()
+POD_NAME = os.getenv('POD_NAME', HOSTNAME)
 
 # HTML template with beautiful UI
 HTML_TEMPLATE = """
@@ -248,38 +251,79 @@ HTML_TEMPLATE = """
 </html>
 """
 
+# Compiled once at startup instead of re-parsing the template per request
+page_template = app.jinja_env.from_string(HTML_TEMPLATE)
+
+# Nothing a pod serves changes while it lives, so one tag covers every response
+POD_ETAG = hashlib.sha1(f"{VERSION}/{HOSTNAME}".encode()).hexdigest()
+
+class PrebuiltResponse:
+    """Response body built once at startup and served from memory"""
+
+    def __init__(self, body, mimetype):
+        self.body = body
+        self.gzipped = gzip.compress(body, mtime=0)
+        self.mimetype = mimetype
+
+    def response(self):
+        gzipped = 'gzip' in request.accept_encodings
+        response = app.response_class(self.gzipped if gzipped else self.body, mimetype=self.mimetype)
+        if gzipped:
+            response.content_encoding = 'gzip'
+        response.set_etag(POD_ETAG + ('-gz' if gzipped else ''))
+        response.vary.add('Accept-Encoding')
+        # Always revalidate: after a switch the same URL reaches another pod
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+prebuilt = {}
+
+def build_responses():
+    """Render the page, /health and /api/info once, then take one request
+    through each route so the new color's first real request isn't the
+    one paying for Flask's lazy setup"""
+    pod_info = {
+        'version': VERSION,
+        'color': COLOR,
+        'pod_name': POD_NAME,
+        'hostname': HOSTNAME
+    }
+    with app.test_request_context():
+        page = render_template(
+            page_template,
+            version=VERSION,
+            color=COLOR,
+            pod_name=POD_NAME,
+            hostname=HOSTNAME
+        )
+        health_body = jsonify({'status': 'healthy', **pod_info}).get_data()
+        info_body = jsonify({**pod_info, 'strategy': 'blue-green'}).get_data()
+    prebuilt.update({
+        'index': PrebuiltResponse(page.encode(), 'text/html'),
+        'health': PrebuiltResponse(health_body, 'application/json'),
+        'info': PrebuiltResponse(info_body, 'application/json'),
+    })
+
+    client = app.test_client()
+    for path in ('/', '/health', '/api/info'):
+        client.get(path, headers={'Accept-Encoding': 'gzip'})
+
 @app.route('/')
 def index():
     """Main page showing version and pod information"""
-    return render_template_string(
-        HTML_TEMPLATE,
-        version=VERSION,
-        color=COLOR,
-        pod_name=POD_NAME,
-        hostname=socket.gethostname()
-    )
+    return prebuilt['index'].response()
 
 @app.route('/health')
 def health():
     """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'version': VERSION,
-        'color': COLOR,
-        'pod_name': POD_NAME,
-        'hostname': socket.gethostname()
-    })
+    return prebuilt['health'].response()
 
 @app.route('/api/info')
 def info():
     """API endpoint returning deployment information"""
-    return jsonify({
-        'version': VERSION,
-        'color': COLOR,
-        'pod_name': POD_NAME,
-        'hostname': socket.gethostname(),
-        'strategy': 'blue-green'
-    })
+    return prebuilt['info'].response()
+
+build_responses()
 
 if __name__ == '__main__':
     print(f"""
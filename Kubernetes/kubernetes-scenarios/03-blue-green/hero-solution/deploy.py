@@ -9,6 +9,10 @@ import subprocess
 import time
 from pathlib import Path
 
+# Shared helpers live next to the scenario folders
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from image_registry import pushed_image_reference
+
 def run_command(cmd, description, check=True):
     """Run a command and print output"""
     print(f"\n{'='*60}")
@@ -100,8 +104,24 @@ def main():
         if not run_command(build_cmd, f"Build {version} Docker image"):
             return False
 
+    # Push to the local registry started by universal-setup.py
+    # (SETUP_LOCAL_REGISTRY=1); nodes then pull only the layers they lack.
+    # Deployed by digest: with a plain tag and IfNotPresent, nodes that
+    # already have the tag would keep the old image after a rebuild
+    registry = os.getenv('WORKSHOP_REGISTRY')
+    if registry:
+        print(f"\n📦 Pushing image to {registry}...")
+        if not run_command(
+            f"docker tag {image_name} {registry}/{image_name} && docker push {registry}/{image_name}",
+            "Push image to local registry"
+        ):
+            return False
+        image_name = pushed_image_reference(f"{registry}/{image_name}")
+        if not image_name:
+            print("\n❌ Could not read the pushed image's digest")
+            return False
     # Load into Kind if needed
-    if env == "kind":
+    elif env == "kind":
         print("\n📦 Loading image into Kind cluster...")
         run_command(f"kind load docker-image {image_name}", "Load image into Kind", check=False)
 
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+📈 Blue-Green Switch Benchmark
+Keeps traffic flowing at the demo-app Service while flipping blue <-> green,
+then reports per switch how long traffic took to converge on the new color
+and how many requests failed or were dropped along the way.
+
+Against the deployed demo (NodePort reachable on localhost:31006):
+    python3 switch-benchmark.py
+
+Through the API server's service proxy (kind, no NodePort mapping):
+    python3 switch-benchmark.py --via-api
+
+Against a local stand-in (two in-process app.py copies behind a proxy):
+    python3 switch-benchmark.py --local
+
+Note: `kubectl port-forward svc/demo-app` pins one pod, so it never sees a
+switch - use the NodePort, --via-api or --local instead.
+"""
+import argparse
+import http.client
+import http.server
+import importlib.util
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# Shared helpers live next to the scenario folders
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from benchmark_stats import percentile
+
+COLORS = ('blue', 'green')
+
+class Sample:
+    """One request: when it ran, which color answered and how it ended"""
+    __slots__ = ('start', 'end', 'color', 'outcome')
+
+    def __init__(self, start, end, color, outcome):
+        self.start = start
+        self.end = end
+        self.color = color
+        self.outcome = outcome  # 'ok', 'error' (HTTP status) or 'dropped' (no response)
+
+def http_fetcher(url, keepalive):
+    """Returns a per-thread fetch() that GETs /api/info and returns (outcome, color)"""
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    local = threading.local()
+
+    def fetch():
+        conn = getattr(local, 'conn', None) if keepalive else None
+        if conn is None:
+            conn = http.client.HTTPConnection(host, port, timeout=5)
+        try:
+            conn.request('GET', '/api/info')
+            response = conn.getresponse()
+            body = response.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            local.conn = None
+            return 'dropped', None
+        if keepalive:
+            local.conn = conn
+        else:
+            conn.close()
+        if response.status != 200:
+            return 'error', None
+        return 'ok', json.loads(body).get('color')
+    return fetch
+
+def api_fetcher(switch):
+    """fetch() through the API server's service proxy, which follows the
+    Service's endpoints like kube-proxy does"""
+    from kubernetes.client.rest import ApiException
+    core = switch.apis()[0]
+
+    def fetch():
+        try:
+            response = core.connect_get_namespaced_service_proxy_with_path(
+                switch.SERVICE, switch.NAMESPACE, 'api/info', _preload_content=False, _request_timeout=5,
+            )
+        except ApiException:
+            return 'error', None
+        except OSError:
+            return 'dropped', None
+        return 'ok', json.loads(response.data).get('color')
+    return fetch
+
+def traffic_worker(fetch, samples, stop):
+    """Request /api/info back to back until told to stop"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        outcome, color = fetch()
+        samples.append(Sample(start, time.perf_counter(), color, outcome))
+
+class ClusterSwitcher:
+    """Flips the real demo-app Service with switch.py's own helpers"""
+
+    def __init__(self):
+        sys.path.insert(0, str(Path(__file__).parent))
+        import switch
+        self.switch = switch
+
+    def current(self):
+        return self.switch.get_current_version()
+
+    def flip(self, target):
+        """Patch the selector; returns ms until the EndpointSlices converged"""
+        return self.switch.cut_over(target, self.switch.get_running_pods(target))
+
+def load_app(color):
+    """A fresh copy of app.py configured as `color`"""
+    os.environ.update(VERSION=f"local-{color}", COLOR=color, POD_NAME=f"local-{color}")
+    spec = importlib.util.spec_from_file_location(f"app_{color}", Path(__file__).parent / 'app.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app
+
+class StandInService(http.server.ThreadingHTTPServer):
+    """Plays the demo-app Service: forwards each request to whichever local
+    app the `selector` points at"""
+    daemon_threads = True
+
+    def __init__(self, backends):
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.backends = backends
+        self.selector = 'blue'
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        port = self.server.backends[self.server.selector]
+        upstream = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+        try:
+            upstream.request('GET', self.path)
+            response = upstream.getresponse()
+            body = response.read()
+        except (OSError, http.client.HTTPException):
+            self.send_error(502)
+            return
+        finally:
+            upstream.close()
+        self.send_response(response.status)
+        self.send_header('Content-Type', response.getheader('Content-Type', 'text/plain'))
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class LocalSwitcher:
+    """Blue and green app.py served in-process behind a StandInService"""
+
+    def __init__(self):
+        from werkzeug.serving import make_server
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        self.servers = []
+        backends = {}
+        for color in COLORS:
+            server = make_server('127.0.0.1', 0, load_app(color), threaded=True)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            self.servers.append(server)
+            backends[color] = server.server_port
+        self.service = StandInService(backends)
+        threading.Thread(target=self.service.serve_forever, daemon=True).start()
+        self.servers.append(self.service)
+        self.url = f"http://127.0.0.1:{self.service.server_port}"
+
+    def current(self):
+        return self.service.selector
+
+    def flip(self, target):
+        start = time.perf_counter()
+        self.service.selector = target
+        return (time.perf_counter() - start) * 1000
+
+    def close(self):
+        for server in self.servers:
+            server.shutdown()
+
+def analyze(samples, switches, end):
+    """Per-switch convergence and failures, from the request log"""
+    rows = []
+    for i, (at, source, target, api_ms) in enumerate(switches):
+        until = switches[i + 1][0] if i + 1 < len(switches) else end
+        window = [s for s in samples if at <= s.start < until]
+        # Last answer from the old color after the patch (requests still in
+        # flight at the next switch may already see that one's color)
+        stale = [s.end for s in window if s.outcome == 'ok' and s.color != target and s.end < until]
+        rows.append({
+            'switch': i + 1,
+            'from': source,
+            'to': target,
+            'api_converge_ms': round(api_ms, 1) if api_ms is not None else None,
+            'traffic_converge_ms': round((max(stale) - at) * 1000, 1) if stale else 0.0,
+            'requests': len(window),
+            'errors': sum(1 for s in window if s.outcome == 'error'),
+            'dropped': sum(1 for s in window if s.outcome == 'dropped'),
+        })
+    return rows
+
+def run_benchmark(switcher, fetch, switches, interval, concurrency):
+    """Drive traffic, flip colors `switches` times, return the report"""
+    samples = []
+    stop = threading.Event()
+    workers = [
+        threading.Thread(target=traffic_worker, args=(fetch, samples, stop))
+        for _ in range(concurrency)
+    ]
+    for worker in workers:
+        worker.start()
+
+    log = []
+    current = switcher.current()
+    try:
+        # Baseline traffic before the first switch
+        time.sleep(interval)
+        for _ in range(switches):
+            target = 'green' if current == 'blue' else 'blue'
+            at = time.perf_counter()
+            api_ms = switcher.flip(target)
+            log.append((at, current, target, api_ms))
+            print(f"   🔄 {current.upper()} → {target.upper()}"
+                  + (f" (endpoints converged in {api_ms:.0f} ms)" if api_ms is not None else " (did not converge)"))
+            current = target
+            time.sleep(interval)
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join()
+    end = time.perf_counter()
+
+    latencies = sorted(s.end - s.start for s in samples if s.outcome == 'ok')
+    return {
+        'switches': analyze(samples, log, end),
+        'requests': len(samples),
+        'errors': sum(1 for s in samples if s.outcome == 'error'),
+        'dropped': sum(1 for s in samples if s.outcome == 'dropped'),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+def print_report(report):
+    """Human-readable report"""
+    print("\n" + "="*70)
+    print("📈 BLUE-GREEN SWITCH BENCHMARK")
+    print("="*70)
+    print(f"   {report['requests']} requests, {report['concurrency']} clients, "
+          f"{len(report['switches'])} switches against {report['target']}")
+    print(f"   Latency: p50 {report['p50_ms']} ms, p95 {report['p95_ms']} ms, p99 {report['p99_ms']} ms")
+    print()
+    print(f"   {'#':>2} {'switch':<15} {'endpoints ms':>13} {'traffic ms':>11} {'requests':>9} {'errors':>7} {'dropped':>8}")
+    for row in report['switches']:
+        api_ms = row['api_converge_ms'] if row['api_converge_ms'] is not None else '-'
+        print(f"   {row['switch']:>2} {row['from'] + ' → ' + row['to']:<15} {api_ms:>13} "
+              f"{row['traffic_converge_ms']:>11} {row['requests']:>9} {row['errors']:>7} {row['dropped']:>8}")
+    print()
+    failed = report['errors'] + report['dropped']
+    print(f"   {'✅' if failed == 0 else '❌'} Failed requests: {failed} "
+          f"({report['errors']} errors, {report['dropped']} dropped)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure blue-green switch latency and request loss")
+    parser.add_argument('--url', default='http://localhost:31006',
+                        help="demo-app Service URL (NodePort)")
+    parser.add_argument('--via-api', action='store_true',
+                        help="Send traffic through the API server's service proxy instead of --url")
+    parser.add_argument('--local', action='store_true',
+                        help="Benchmark a local stand-in instead of the cluster")
+    parser.add_argument('--switches', type=int, default=4, help="Number of color flips")
+    parser.add_argument('--interval', type=float, default=10.0,
+                        help="Seconds of traffic before the first flip and between flips")
+    parser.add_argument('--concurrency', type=int, default=10, help="Concurrent clients")
+    parser.add_argument('--keepalive', action='store_true',
+                        help="Reuse client connections (shows connections pinned to the old color)")
+    parser.add_argument('--json', metavar='FILE', help="Also write the report as JSON")
+    args = parser.parse_args()
+
+    local = None
+    try:
+        if args.local:
+            local = LocalSwitcher()
+            switcher, target = local, 'local stand-in'
+            fetch = http_fetcher(local.url, args.keepalive)
+            print(f"🚀 Local blue and green behind a stand-in Service at {local.url}")
+        else:
+            switcher = ClusterSwitcher()
+            if switcher.current() not in COLORS:
+                print("❌ demo-app Service not found or not pointing at blue/green - run deploy.py first")
+                return False
+            if args.via_api:
+                fetch, target = api_fetcher(switcher.switch), 'service proxy'
+            else:
+                fetch, target = http_fetcher(args.url, args.keepalive), args.url
+
+        print(f"⏱️  {args.switches} switches, {args.interval:.0f}s apart, {args.concurrency} clients...")
+        report = run_benchmark(switcher, fetch, args.switches, args.interval, args.concurrency)
+        report.update(target=target, concurrency=args.concurrency)
+        print_report(report)
+
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"\n📝 Report written to {args.json}")
+        return True
+    finally:
+        if local:
+            local.close()
+
+if __name__ == '__main__':
+    try:
+        sys.exit(0 if main() else 1)
+    except KeyboardInterrupt:
+        print("\n\n❌ Benchmark cancelled by user")
+        sys.exit(1)
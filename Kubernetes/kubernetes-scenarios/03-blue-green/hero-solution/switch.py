@@ -3,34 +3,161 @@
 🔄 Blue-Green Version Switcher
 Easily switch between blue and green deployments
 """
+import os
 import sys
-import subprocess
+import json
 import time
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from kubernetes import client, config, watch
+from kubernetes.client.rest import ApiException
 
-def run_command(cmd, capture=True):
-    """Run a command"""
-    result = subprocess.run(
-        cmd,
-        shell=True,
-        capture_output=capture,
-        text=True
-    )
-    return result
+# Shared helpers live next to the scenario folders
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from benchmark_stats import percentile
+
+NAMESPACE = 'blue-green-demo'
+SERVICE = 'demo-app'
+# How long to wait for the Service's endpoints to move to the new color
+CONVERGE_TIMEOUT = 30
+
+# Gated cutover (switch.py <color> --gated)
+GATE_READY_TIMEOUT = int(os.getenv('GATE_READY_TIMEOUT', 120))
+GATE_REQUESTS = int(os.getenv('GATE_REQUESTS', 50))
+GATE_CONCURRENCY = int(os.getenv('GATE_CONCURRENCY', 5))
+GATE_MAX_P95_MS = float(os.getenv('GATE_MAX_P95_MS', 500))
+GATE_MAX_ERROR_RATE = float(os.getenv('GATE_MAX_ERROR_RATE', 0.01))
+GATE_WATCH_SECONDS = float(os.getenv('GATE_WATCH_SECONDS', 30))
+# Post-switch probes needed before the error rate can trigger a rollback
+GATE_MIN_SAMPLES = 10
+GATE_PROBE_INTERVAL = 0.1
+
+@functools.lru_cache(maxsize=None)
+def apis():
+    """Load kubeconfig once; every call below reuses the same API connection"""
+    try:
+        config.load_kube_config()
+    except config.ConfigException:
+        config.load_incluster_config()
+    configuration = client.Configuration.get_default_copy()
+    # Room for the gated switch's concurrent probes on the shared connection pool
+    configuration.connection_pool_maxsize = max(4, GATE_CONCURRENCY)
+    api_client = client.ApiClient(configuration)
+    return client.CoreV1Api(api_client), client.DiscoveryV1Api(api_client), client.AppsV1Api(api_client)
 
 def get_current_version():
     """Get currently active version"""
-    result = run_command(
-        "kubectl get service demo-app -n blue-green-demo -o jsonpath='{.spec.selector.version}' 2>/dev/null"
-    )
-    return result.stdout.strip() or "none"
+    core = apis()[0]
+    try:
+        service = core.read_namespaced_service(SERVICE, NAMESPACE)
+    except ApiException as e:
+        if e.status == 404:
+            return "none"
+        raise
+    return (service.spec.selector or {}).get('version') or "none"
+
+def get_running_pods(version):
+    """Names of running pods for a version"""
+    core = apis()[0]
+    pods = core.list_namespaced_pod(NAMESPACE, label_selector=f"version={version}")
+    return {pod.metadata.name for pod in pods.items if pod.status.phase == 'Running'}
 
 def get_pod_count(version):
     """Get number of running pods for a version"""
-    result = run_command(
-        f"kubectl get pods -n blue-green-demo -l version={version} -o jsonpath='{{.items[*].status.phase}}' 2>/dev/null"
-    )
-    phases = result.stdout.strip().split()
-    return len([p for p in phases if p == 'Running'])
+    return len(get_running_pods(version))
+
+def patch_selector(version):
+    """Point the Service at `version` pods"""
+    core = apis()[0]
+    core.patch_namespaced_service(SERVICE, NAMESPACE, {'spec': {'selector': {'version': version}}})
+
+def ready_endpoint_pods(slices):
+    """Pod names behind the ready endpoints of a set of EndpointSlices"""
+    return {
+        endpoint.target_ref.name
+        for endpoint_slice in slices.values()
+        for endpoint in endpoint_slice.endpoints or []
+        # An unset ready condition means "unknown", which consumers treat as ready
+        if endpoint.target_ref and endpoint.conditions.ready is not False
+    }
+
+def watch_endpoints(service, done, timeout):
+    """Watch a Service's EndpointSlices until `done(ready pod names)` holds.
+    Returns the ready pod names then, or None on timeout."""
+    discovery = apis()[1]
+    selector = f"kubernetes.io/service-name={service}"
+    deadline = time.monotonic() + timeout
+
+    resource_version = None
+
+    while True:
+        if resource_version is None:
+            listing = discovery.list_namespaced_endpoint_slice(NAMESPACE, label_selector=selector)
+            slices = {item.metadata.name: item for item in listing.items}
+            resource_version = listing.metadata.resource_version
+
+        serving = ready_endpoint_pods(slices)
+        if done(serving):
+            return serving
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+
+        stream = watch.Watch().stream(
+            discovery.list_namespaced_endpoint_slice, NAMESPACE,
+            label_selector=selector, resource_version=resource_version,
+            timeout_seconds=max(1, int(remaining)),
+        )
+        try:
+            for event in stream:
+                endpoint_slice = event['object']
+                resource_version = endpoint_slice.metadata.resource_version
+                if event['type'] == 'DELETED':
+                    slices.pop(endpoint_slice.metadata.name, None)
+                else:
+                    slices[endpoint_slice.metadata.name] = endpoint_slice
+                serving = ready_endpoint_pods(slices)
+                if done(serving):
+                    return serving
+        except ApiException as e:
+            # 410 Gone: our resourceVersion is too old to resume from;
+            # re-list and watch again from the fresh one
+            if e.status != 410:
+                raise
+            resource_version = None
+
+def wait_for_endpoints(target_pods, timeout=CONVERGE_TIMEOUT):
+    """Watch the Service's EndpointSlices until only `target_pods` receive
+    traffic. Returns True once converged, False on timeout."""
+    converged = lambda serving: serving and serving <= target_pods
+    return watch_endpoints(SERVICE, converged, timeout) is not None
+
+def cut_over(target_version, target_pods):
+    """Patch the selector and wait for the endpoints to follow.
+    Returns the time that took in ms, or None if it failed."""
+    start = time.perf_counter()
+    try:
+        patch_selector(target_version)
+    except ApiException as e:
+        print(f"❌ Failed to switch traffic: {e.reason}")
+        return None
+
+    if not wait_for_endpoints(target_pods):
+        print(f"⚠️  Selector switched, but endpoints still include non-{target_version} pods after {CONVERGE_TIMEOUT}s")
+        print("   Check with: kubectl get endpointslices -n blue-green-demo -l kubernetes.io/service-name=demo-app")
+        return None
+    return (time.perf_counter() - start) * 1000
+
+def print_switched(current, target_version, elapsed_ms):
+    """Summary after a successful switch"""
+    print(f"\n✅ Traffic switched to {target_version.upper()} version!")
+    print(f"   Endpoints converged in {elapsed_ms:.0f} ms")
+    print(f"\n🎯 RESULT:")
+    print(f"   Old version ({current.upper()}): Still running, but no traffic")
+    print(f"   New version ({target_version.upper()}): Receiving all traffic")
+    print(f"\n💡 TIP: Refresh http://localhost:31006 to see the change!")
+    print(f"💡 TIP: You can instantly rollback with: python3 switch.py {current}")
 
 def switch_version(target_version):
     """Switch service to target version"""
@@ -43,30 +170,128 @@ def switch_version(target_version):
     print(f"\n🔄 Switching from {current.upper()} to {target_version.upper()}...")
 
     # Check if target deployment exists and has pods
-    pod_count = get_pod_count(target_version)
-    if pod_count == 0:
+    target_pods = get_running_pods(target_version)
+    if not target_pods:
         print(f"❌ No running {target_version} pods found!")
         print(f"   Deploy {target_version} pods first with: kubectl scale deployment {target_version}-deployment -n blue-green-demo --replicas=3")
         return False
 
-    print(f"   Found {pod_count} running {target_version.upper()} pods ✓")
+    print(f"   Found {len(target_pods)} running {target_version.upper()} pods ✓")
+
+    elapsed_ms = cut_over(target_version, target_pods)
+    if elapsed_ms is None:
+        return False
+    print_switched(current, target_version, elapsed_ms)
+    return True
+
+def probe(service, expected_color=None):
+    """One GET /api/info through the API server's service proxy.
+    Returns (latency in seconds, ok)."""
+    core = apis()[0]
+    start = time.perf_counter()
+    try:
+        response = core.connect_get_namespaced_service_proxy_with_path(
+            service, NAMESPACE, 'api/info', _preload_content=False, _request_timeout=5,
+        )
+        info = json.loads(response.data)
+        ok = expected_color is None or info.get('color') == expected_color
+    except (ApiException, OSError, ValueError):
+        ok = False
+    return time.perf_counter() - start, ok
+
+def synthetic_burst(service, expected_color):
+    """GATE_REQUESTS probes against `service`, GATE_CONCURRENCY at a time"""
+    with ThreadPoolExecutor(max_workers=GATE_CONCURRENCY) as pool:
+        results = list(pool.map(lambda _: probe(service, expected_color), range(GATE_REQUESTS)))
+    latencies = sorted(latency for latency, ok in results if ok)
+    errors = sum(1 for _, ok in results if not ok)
+    return {
+        'requests': len(results),
+        'errors': errors,
+        'error_rate': errors / len(results) if results else 1.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+    }
+
+def watch_live_traffic(seconds):
+    """Probe the live Service for `seconds`. Returns (requests, errors),
+    stopping early once the error rate is over GATE_MAX_ERROR_RATE."""
+    requests = errors = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        _, ok = probe(SERVICE)
+        requests += 1
+        errors += 0 if ok else 1
+        if requests >= GATE_MIN_SAMPLES and errors / requests > GATE_MAX_ERROR_RATE:
+            break
+        time.sleep(GATE_PROBE_INTERVAL)
+    return requests, errors
 
-    # Switch the service selector
-    cmd = f"kubectl patch service demo-app -n blue-green-demo -p '{{\"spec\":{{\"selector\":{{\"version\":\"{target_version}\"}}}}}}'"
-    result = run_command(cmd, capture=False)
+def gated_switch(target_version):
+    """Switch only after the target color proves itself, and switch back
+    if errors spike right after the cutover"""
+    current = get_current_version()
 
-    if result.returncode == 0:
-        print(f"\n✅ Traffic switched to {target_version.upper()} version!")
-        print(f"\n🎯 RESULT:")
-        print(f"   Old version ({current.upper()}): Still running, but no traffic")
-        print(f"   New version ({target_version.upper()}): Receiving all traffic")
-        print(f"\n💡 TIP: Refresh http://localhost:31006 to see the change!")
-        print(f"💡 TIP: You can instantly rollback with: python3 switch.py {current}")
+    if current == target_version:
+        print(f"\n⚠️  Already running {target_version.upper()} version!")
         return True
-    else:
-        print(f"❌ Failed to switch traffic")
+
+    print(f"\n🚦 Gated switch from {current.upper()} to {target_version.upper()}...")
+    preview = f"{SERVICE}-{target_version}"
+
+    # 1. Every replica of the target color is a Ready endpoint
+    apps = apis()[2]
+    try:
+        replicas = apps.read_namespaced_deployment(f"{target_version}-deployment", NAMESPACE).spec.replicas
+    except ApiException as e:
+        print(f"❌ Cannot read {target_version}-deployment: {e.reason}")
+        return False
+    if not replicas:
+        print(f"❌ {target_version}-deployment is scaled to 0")
         return False
 
+    print(f"   ⏳ Waiting for {replicas} ready endpoints behind {preview}...")
+    target_pods = watch_endpoints(preview, lambda serving: len(serving) >= replicas, GATE_READY_TIMEOUT)
+    if target_pods is None:
+        print(f"❌ {target_version.upper()} endpoints not ready after {GATE_READY_TIMEOUT}s - traffic stays on {current.upper()}")
+        return False
+    print(f"   {len(target_pods)} {target_version.upper()} endpoints ready ✓")
+
+    # 2. Synthetic traffic against the target pods meets the thresholds
+    print(f"   🧪 Sending {GATE_REQUESTS} requests to {preview}...")
+    burst = synthetic_burst(preview, target_version)
+    print(f"   p50 {burst['p50_ms']:.0f} ms, p95 {burst['p95_ms']:.0f} ms, "
+          f"errors {burst['errors']}/{burst['requests']}")
+    if burst['error_rate'] > GATE_MAX_ERROR_RATE or burst['p95_ms'] > GATE_MAX_P95_MS:
+        print(f"🛑 Gate failed (limits: p95 {GATE_MAX_P95_MS:.0f} ms, error rate {GATE_MAX_ERROR_RATE:.0%}) "
+              f"- traffic stays on {current.upper()}")
+        return False
+    print("   Gate passed ✓")
+
+    # 3. Cut over
+    elapsed_ms = cut_over(target_version, target_pods)
+    if elapsed_ms is None:
+        return False
+    print(f"   Switched in {elapsed_ms:.0f} ms, watching live traffic for {GATE_WATCH_SECONDS:.0f}s...")
+
+    # 4. Roll back if the live Service starts failing
+    requests, errors = watch_live_traffic(GATE_WATCH_SECONDS)
+    if requests >= GATE_MIN_SAMPLES and errors / requests > GATE_MAX_ERROR_RATE:
+        print(f"🚨 {errors}/{requests} live requests failed after the switch")
+        if current == "none":
+            print("❌ No previous version to roll back to")
+            return False
+        rollback_ms = cut_over(current, get_running_pods(current))
+        if rollback_ms is None:
+            print(f"❌ Rollback to {current.upper()} did not converge - check the service now!")
+        else:
+            print(f"↩️  Rolled back to {current.upper()} in {rollback_ms:.0f} ms")
+        return False
+    print(f"   {requests - errors}/{requests} live requests succeeded ✓")
+
+    print_switched(current, target_version, elapsed_ms)
+    return True
+
 def show_status():
     """Show current deployment status"""
     print("\n" + "="*60)
@@ -106,22 +331,30 @@ Commands:
     green    - Switch to GREEN version (v2.0)
     status   - Show current deployment status
 
+Options:
+    --gated  - Wait for the target's endpoints to be Ready, load-test it,
+               switch only if it passes, and roll back if errors spike
+               (tune with GATE_REQUESTS, GATE_MAX_P95_MS, GATE_MAX_ERROR_RATE,
+               GATE_WATCH_SECONDS)
+
 Examples:
-    python3 switch.py green    # Switch to green
-    python3 switch.py blue     # Switch to blue
-    python3 switch.py status   # Show status
+    python3 switch.py green            # Switch to green
+    python3 switch.py green --gated    # Switch to green behind checks
+    python3 switch.py blue             # Switch to blue
+    python3 switch.py status           # Show status
         """)
         return 1
 
     command = sys.argv[1].lower()
+    switch = gated_switch if '--gated' in sys.argv[2:] else switch_version
 
     if command == 'status':
         show_status()
     elif command == 'blue':
-        if not switch_version('blue'):
+        if not switch('blue'):
             return 1
     elif command == 'green':
-        if not switch_version('green'):
+        if not switch('green'):
             return 1
     else:
         print(f"❌ Unknown command: {command}")
@@ -0,0 +1,11 @@
+"""
+Benchmark Statistics
+Helpers shared by the scenarios' benchmark and switch scripts
+"""
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a sorted list"""
+    if not samples:
+        return 0.0
+    index = max(0, int(round(pct / 100 * len(samples))) - 1)
+    return samples[min(index, len(samples) - 1)]
@@ -0,0 +1,19 @@
+"""
+Image Registry
+Helpers shared by the scenarios' deploy scripts
+"""
+import json
+import subprocess
+
+def pushed_image_reference(image):
+    """`image` pinned to the digest the registry stored. A rebuilt image
+    pushed under the same tag then changes the pod spec, so pods roll and
+    nodes never keep running a stale cached copy of the tag."""
+    repository = image.rsplit(':', 1)[0]
+    result = subprocess.run(f"docker image inspect -f '{{{{json .RepoDigests}}}}' {image}",
+                            shell=True, capture_output=True, text=True)
+    if result.returncode == 0:
+        for reference in json.loads(result.stdout or 'null') or []:
+            if reference.startswith(f"{repository}@"):
+                return reference
+    return None
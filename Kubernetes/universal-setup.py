@@ -4,11 +4,17 @@
 Pre-builds ALL images and resources to eliminate delays during workshop scenarios!
 
 This script ensures ZERO DELAYS during the workshop by:
-- Pre-building all Docker images for all scenarios
-- Pre-pulling common base images
-- Pre-creating Kubernetes namespaces
-- Pre-loading images into Kind/Minikube if needed
+- Pre-building all Docker images for all scenarios, in parallel, skipping
+  images whose Dockerfile and copied files haven't changed
+- Pre-pulling common base images concurrently, skipping ones already present
+  at their pinned digest (base-images.lock.json)
+- Pre-creating Kubernetes namespaces and shared resources with one
+  idempotent server-side apply
+- Pre-loading images into Kind/Minikube if needed (or, with
+  SETUP_LOCAL_REGISTRY=1 on kind, pushing them to a local registry)
 - Verifying all prerequisites
+- Timing every phase, pull, build and load into setup-trace.json (a Chrome
+  trace; override with SETUP_TRACE_FILE) and comparing with the last run
 
 Run this ONCE before the workshop, then scenarios will run INSTANTLY!
 """
@@ -19,9 +25,21 @@ import os
 import platform
 import time
 import json
+import glob
+import hashlib
+import re
+import functools
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+try:
+    from kubernetes import client as k8s_client, config as k8s_config
+    from kubernetes.client.rest import ApiException
+except ImportError:
+    k8s_client = None  # bootstrap falls back to a single `kubectl apply --server-side`
+
 class Colors:
     """ANSI color codes"""
     CYAN = '\033[96m'
@@ -83,6 +101,120 @@ def print_info(message):
     """Print info message"""
     colored_print(f"ℹ️  {message}", Colors.CYAN)
 
+# Chrome trace of this run's phases (open in https://ui.perfetto.dev or
+# chrome://tracing); the previous run's trace is read back for comparison
+TRACE_FILE = Path(os.getenv('SETUP_TRACE_FILE', Path(__file__).parent / "setup-trace.json"))
+
+# Virtual and container interfaces would count the same bytes twice
+VIRTUAL_INTERFACES = ('lo', 'docker', 'veth', 'br-', 'cni', 'flannel', 'kind')
+
+def read_counters():
+    """CPU seconds, disk bytes and network bytes used so far. Host-wide
+    from /proc on Linux (docker builds run in the daemon, not under this
+    process); elsewhere only the CPU time of our child processes."""
+    times = os.times()
+    counters = {'child_cpu_s': times.children_user + times.children_system}
+    try:
+        with open('/proc/stat') as f:
+            ticks = [int(value) for value in f.readline().split()[1:]]
+        # Everything but idle and iowait
+        counters['host_cpu_s'] = (sum(ticks) - ticks[3] - ticks[4]) / os.sysconf('SC_CLK_TCK')
+
+        read = written = 0
+        with open('/proc/diskstats') as f:
+            for line in f:
+                fields = line.split()
+                # Whole disks only; partitions would count the same sectors again
+                if re.fullmatch(r'(sd|vd|xvd)[a-z]+|nvme\d+n\d+|mmcblk\d+', fields[2]):
+                    read += int(fields[5]) * 512
+                    written += int(fields[9]) * 512
+        counters['disk_read_bytes'] = read
+        counters['disk_write_bytes'] = written
+
+        received = sent = 0
+        with open('/proc/net/dev') as f:
+            for line in f.readlines()[2:]:
+                name, data = line.split(':', 1)
+                if name.strip().startswith(VIRTUAL_INTERFACES):
+                    continue
+                fields = data.split()
+                received += int(fields[0])
+                sent += int(fields[8])
+        counters['net_rx_bytes'] = received
+        counters['net_tx_bytes'] = sent
+    except (OSError, ValueError, IndexError):
+        pass
+    return counters
+
+class SetupProfiler:
+    """Timing spans with resource counters, written as Chrome trace events"""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.events = []
+        self.threads = {}
+        self.lock = threading.Lock()
+
+    def thread_id(self):
+        """Small stable id per thread so concurrent builds get their own track"""
+        ident = threading.get_ident()
+        with self.lock:
+            if ident not in self.threads:
+                self.threads[ident] = len(self.threads) + 1
+                self.events.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': self.threads[ident],
+                                    'args': {'name': threading.current_thread().name}})
+            return self.threads[ident]
+
+    @contextmanager
+    def span(self, name, category, **args):
+        """Time the enclosed block. Counters are host-wide, so spans that
+        run at the same time share the same activity."""
+        tid = self.thread_id()
+        before = read_counters()
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            end = time.perf_counter()
+            after = read_counters()
+            args.update({key: round(after[key] - before[key], 3) for key in after if key in before})
+            with self.lock:
+                self.events.append({
+                    'name': name, 'cat': category, 'ph': 'X', 'pid': 1, 'tid': tid,
+                    'ts': round((start - self.origin) * 1e6), 'dur': round((end - start) * 1e6),
+                    'args': args,
+                })
+
+    def durations(self):
+        """{span name: seconds} for this run"""
+        return {e['name']: e['dur'] / 1e6 for e in self.events if e['ph'] == 'X'}
+
+    def write(self, path):
+        """Save the trace, returning the previous run's span durations"""
+        previous = {}
+        try:
+            old = json.loads(Path(path).read_text())
+            previous = {e['name']: e['dur'] / 1e6 for e in old.get('traceEvents', []) if e.get('ph') == 'X'}
+        except (OSError, ValueError):
+            pass
+        Path(path).write_text(json.dumps({
+            'traceEvents': self.events,
+            'displayTimeUnit': 'ms',
+            'otherData': {'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(time.time() - (time.perf_counter() - self.origin)))},
+        }, indent=1))
+        return previous
+
+profiler = SetupProfiler()
+
+def traced(function):
+    """Record every call of a setup phase as a span"""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with profiler.span(function.__name__, 'phase'):
+            return function(*args, **kwargs)
+    return wrapper
+
+@traced
 def detect_environment():
     """Detect the current environment type"""
     print_step("Detecting environment...")
@@ -124,6 +256,7 @@ def detect_environment():
 
     return env_info
 
+@traced
 def check_prerequisites():
     """Check all prerequisites are met"""
     print_step("Checking prerequisites...")
@@ -160,58 +293,272 @@ def check_prerequisites():
 
     return errors, warnings
 
+BASE_IMAGES = [
+    "python:3.11-slim",
+    "python:3.11-alpine",
+    "redis:alpine",
+    "postgres:15-alpine",
+    "nginx:alpine"
+]
+# image -> digest this workshop was set up with. Written after the first
+# pull; commit it to pin every machine to the same base images.
+BASE_IMAGE_PINS = Path(__file__).parent / "base-images.lock.json"
+
+def local_image_digests(image):
+    """Registry digests of a local image, or None if it isn't present"""
+    success, output, _ = run_command(f"docker image inspect -f '{{{{json .RepoDigests}}}}' {image}")
+    if not success:
+        return None
+    return [d.split('@', 1)[1] for d in json.loads(output or '[]') if '@' in d]
+
+def pull_base_image(image, pinned=None):
+    """Pull one base image unless the local copy already matches its pin.
+    Returns (status, digest, seconds) with status pulled/cached/failed."""
+    with profiler.span(f"pull {image}", 'pull'):
+        start = time.time()
+        digests = local_image_digests(image)
+        if digests is not None and (pinned is None or pinned in digests):
+            return 'cached', pinned or (digests[0] if digests else None), 0.0
+
+        if pinned:
+            repository = image.rsplit(':', 1)[0]
+            cmd = f"docker pull {repository}@{pinned} && docker tag {repository}@{pinned} {image}"
+        else:
+            cmd = f"docker pull {image}"
+        success, _, _ = run_command(cmd, timeout=180)
+        if not success:
+            return 'failed', pinned, time.time() - start
+
+        digests = local_image_digests(image) or []
+        return 'pulled', pinned or (digests[0] if digests else None), time.time() - start
+
+@traced
 def pre_pull_base_images():
     """Pre-pull common base images to save time"""
     print_step("Pre-pulling common base images...")
 
-    base_images = [
-        "python:3.11-slim",
-        "python:3.11-alpine",
-        "redis:alpine",
-        "postgres:15-alpine",
-        "nginx:alpine"
-    ]
+    pins = json.loads(BASE_IMAGE_PINS.read_text()) if BASE_IMAGE_PINS.exists() else {}
+    counts = {'pulled': 0, 'cached': 0, 'failed': 0}
+    new_pins = dict(pins)
+
+    # Pulls are network-bound, so run them all at once
+    with ThreadPoolExecutor(max_workers=len(BASE_IMAGES)) as pool:
+        pulls = {pool.submit(pull_base_image, image, pins.get(image)): image for image in BASE_IMAGES}
+        for done, future in enumerate(as_completed(pulls), 1):
+            image = pulls[future]
+            status, digest, seconds = future.result()
+            counts[status] += 1
+            progress = f"[{done}/{len(BASE_IMAGES)}]"
+            if status == 'pulled':
+                print_success(f"  {progress} Pulled {image} ({seconds:.1f}s)")
+            elif status == 'cached':
+                print_info(f"  {progress} {image} already present" + (" (pinned digest)" if image in pins else ""))
+            else:
+                print_warning(f"  {progress} Failed to pull {image} (will download on-demand)")
+            if digest:
+                new_pins.setdefault(image, digest)
 
-    pulled = 0
-    for image in base_images:
-        print_info(f"Pulling {image}...")
-        success, _, _ = run_command(f"docker pull {image}", timeout=180)
-        if success:
-            print_success(f"  Pulled {image}")
-            pulled += 1
-        else:
-            print_warning(f"  Failed to pull {image} (will download on-demand)")
+    if new_pins != pins:
+        BASE_IMAGE_PINS.write_text(json.dumps(new_pins, indent=2, sort_keys=True) + "\n")
+        print_info(f"Recorded base image digests in {BASE_IMAGE_PINS.name}")
 
-    print_success(f"Pre-pulled {pulled}/{len(base_images)} base images")
+    print_success(f"Base images: {counts['pulled']} pulled, {counts['cached']} already present, "
+                  f"{counts['failed']} failed")
     return True
 
-def build_image(dockerfile_path, image_tag, context_path, env_type, build_args=None):
-    """Build a single Docker image"""
-    build_args_str = f"--build-arg {build_args}" if build_args else ""
-    build_cmd = f"docker build {build_args_str} -f {dockerfile_path} -t {image_tag} {context_path}"
+# Label that records which Dockerfile + build context an image was built from
+CONTENT_HASH_LABEL = "workshop.content-hash"
 
+def docker_command(cmd, env_type):
+    """Point a docker command at the daemon the cluster uses"""
     # For Minikube, use Minikube's Docker daemon
     if env_type == 'minikube':
-        build_cmd = f"eval $(minikube docker-env) && {build_cmd}"
+        return f"eval $(minikube docker-env) && {cmd}"
+    return cmd
+
+def parse_build_args(build_args):
+    """'KEY=value' (or None) -> {'KEY': 'value'}"""
+    if not build_args:
+        return {}
+    key, _, value = build_args.partition('=')
+    return {key: value}
+
+def copied_sources(dockerfile_path, context_path, build_args=None):
+    """Files the Dockerfile COPYs/ADDs from the build context, or None when
+    they can't be worked out (e.g. `COPY . .`) and the whole context counts"""
+    args = {}
+    sources = []
+    for line in Path(dockerfile_path).read_text().splitlines():
+        words = line.split()
+        if not words:
+            continue
+        instruction = words[0].upper()
+        if instruction == 'ARG':
+            name, _, default = words[1].partition('=')
+            args[name] = default
+            args.update({k: v for k, v in parse_build_args(build_args).items() if k == name})
+        elif instruction in ('COPY', 'ADD'):
+            operands = [w for w in words[1:] if not w.startswith('--')]
+            if any(w.startswith('--from') for w in words[1:]):
+                continue
+            for source in operands[:-1]:
+                source = re.sub(r'\$\{?(\w+)\}?', lambda m: args.get(m.group(1), ''), source)
+                matches = glob.glob(str(Path(context_path) / source))
+                if not matches or any(Path(match).is_dir() for match in matches):
+                    return None
+                sources.extend(matches)
+    return sorted(sources)
+
+def image_content_hash(dockerfile_path, context_path, build_args=None):
+    """Hash of the Dockerfile, its build args and the context files it copies"""
+    digest = hashlib.sha256()
+    digest.update(Path(dockerfile_path).read_bytes())
+    digest.update((build_args or '').encode())
+
+    context = Path(context_path)
+    sources = copied_sources(dockerfile_path, context_path, build_args)
+    if sources is None:
+        sources = sorted(str(path) for path in context.rglob('*')
+                         if path.is_file() and '__pycache__' not in path.parts)
+    for source in sources:
+        digest.update(Path(source).relative_to(context).as_posix().encode() + b'\0')
+        digest.update(Path(source).read_bytes())
+    return digest.hexdigest()[:32]
+
+def image_is_current(image_tag, content_hash, env_type):
+    """True when the existing image was built from exactly this content"""
+    success, label, _ = run_command(docker_command(
+        f"docker image inspect -f '{{{{ index .Config.Labels \"{CONTENT_HASH_LABEL}\" }}}}' {image_tag}", env_type))
+    return success and label == content_hash
 
-    success, _, error = run_command(build_cmd, timeout=600)
+def build_image(dockerfile_path, image_tag, context_path, env_type, build_args=None):
+    """Build a single Docker image unless an identical one already exists.
+    Returns (success, message, built)."""
+    with profiler.span(f"build {image_tag}", 'build'):
+        content_hash = image_content_hash(dockerfile_path, context_path, build_args)
+        if image_is_current(image_tag, content_hash, env_type):
+            return True, f"Up to date: {image_tag}", False
+
+        build_args_str = f"--build-arg {build_args}" if build_args else ""
+        build_cmd = (f"docker build {build_args_str} --label {CONTENT_HASH_LABEL}={content_hash} "
+                     f"-f {dockerfile_path} -t {image_tag} {context_path}")
+        success, _, error = run_command(docker_command(build_cmd, env_type), timeout=600)
 
-    if success:
-        # For Kind, load image into cluster
+        if success:
+            return True, f"Built: {image_tag}", True
+        else:
+            return False, f"Failed: {image_tag} - {error[:100]}", False
+
+# Optional local registry (SETUP_LOCAL_REGISTRY=1, kind only): images are
+# pushed once and nodes pull just the layers they're missing, instead of
+# `kind load` copying every image in full into every node
+REGISTRY_NAME = "kind-registry"
+REGISTRY_PORT = 5001
+REGISTRY_ADDRESS = f"localhost:{REGISTRY_PORT}"
+
+@traced
+def start_local_registry(env_info):
+    """Run a registry container on the kind network and point every node's
+    containerd at it. Returns the registry address, or None to fall back
+    to `kind load`."""
+    print_step("Starting local image registry...")
+
+    if env_info['k8s_type'] != 'kind':
+        print_warning("Local registry mode supports kind only - "
+                      "Minikube builds straight into its own Docker daemon already")
+        return None
+
+    success, running, _ = run_command(f"docker inspect -f '{{{{.State.Running}}}}' {REGISTRY_NAME}")
+    if not success:
+        success, _, error = run_command(
+            f"docker run -d --restart=always -p 127.0.0.1:{REGISTRY_PORT}:5000 "
+            f"--network bridge --name {REGISTRY_NAME} registry:2", timeout=180)
+        if not success:
+            print_warning(f"Could not start registry: {error[:100]}")
+            return None
+    elif running != 'true':
+        run_command(f"docker start {REGISTRY_NAME}")
+
+    # Let the nodes reach the registry by name (fails harmlessly if already connected)
+    run_command(f"docker network connect kind {REGISTRY_NAME}")
+
+    context = env_info['k8s_context']
+    cluster = context[len('kind-'):] if context.startswith('kind-') else context
+    success, nodes, _ = run_command(f"kind get nodes --name {cluster}")
+    if not success or not nodes:
+        print_warning(f"Could not list nodes of kind cluster '{cluster}'")
+        return None
+
+    hosts_dir = f"/etc/containerd/certs.d/{REGISTRY_ADDRESS}"
+    hosts_toml = f'[host."http://{REGISTRY_NAME}:5000"]'
+    for node in nodes.split():
+        # Per-registry host configs only work when the cluster was created
+        # with containerd's config_path set (see .devcontainer/kind-config.yaml)
+        success, _, _ = run_command(f"docker exec {node} grep -q '/etc/containerd/certs.d' /etc/containerd/config.toml")
+        if not success:
+            print_warning(f"Node {node} has no containerd registry config_path - "
+                          "recreate the cluster with .devcontainer/kind-config.yaml to use the registry")
+            return None
+        run_command(f"printf '%s\\n' '{hosts_toml}' | docker exec -i {node} sh -c 'mkdir -p {hosts_dir} && cat > {hosts_dir}/hosts.toml'")
+
+    # The local-registry-hosting ConfigMap is applied with the other shared
+    # resources in bootstrap_cluster_resources()
+    print_success(f"Local registry ready at {REGISTRY_ADDRESS} ({len(nodes.split())} nodes)")
+    return REGISTRY_ADDRESS
+
+def load_image(image_tag, env_type, registry=None):
+    """Make a built image available to the cluster's nodes"""
+    with profiler.span(f"{'push' if registry else 'load'} {image_tag}", 'load'):
+        # With a local registry, push once; docker only uploads missing layers
+        if registry:
+            success, _, error = run_command(
+                f"docker tag {image_tag} {registry}/{image_tag} && docker push {registry}/{image_tag}", timeout=300)
+            if success:
+                return True, f"Pushed: {registry}/{image_tag}"
+            else:
+                return False, f"Push failed: {image_tag} - {error[:100]}"
+
+        # For Kind, load image into cluster (kind skips nodes that already have it)
         if env_type == 'kind':
             load_success, _, _ = run_command(f"kind load docker-image {image_tag}", timeout=120)
             if load_success:
-                return True, f"Built and loaded: {image_tag}"
+                return True, f"Loaded into kind: {image_tag}"
             else:
-                return True, f"Built (load failed): {image_tag}"
-        return True, f"Built: {image_tag}"
-    else:
-        return False, f"Failed: {image_tag} - {error[:100]}"
+                return False, f"Load failed: {image_tag}"
+        return True, None
 
+def available_memory_bytes():
+    """MemAvailable (free memory plus reclaimable page cache), or None"""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    # No /proc/meminfo (macOS): free pages are the best sysconf offers
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_AVPHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        return None  # sysconf names differ per platform
+
+def build_parallelism(image_count):
+    """How many builds to run at once: one per CPU (the builds mostly wait
+    on the network and pip) and per ~1.5 GB of available memory,
+    overridable with SETUP_BUILD_JOBS"""
+    if os.getenv('SETUP_BUILD_JOBS'):
+        return max(1, int(os.getenv('SETUP_BUILD_JOBS')))
+
+    by_cpu = os.cpu_count() or 1
+    available = available_memory_bytes()
+    by_memory = max(1, int(available / (1.5 * 1024**3))) if available else by_cpu
+    return max(1, min(by_cpu, by_memory, image_count))
+
+@traced
 def pre_build_all_images(env_info):
     """Pre-build ALL Docker images for workshop scenarios"""
-    print_step("Pre-building ALL scenario Docker images (this takes 5-10 minutes)...")
-    print_info("☕ Grab coffee! This ensures INSTANT scenario execution later!")
+    print_step("Pre-building ALL scenario Docker images (unchanged images are skipped)...")
+    print_info("☕ First run takes a few minutes - this ensures INSTANT scenario execution later!")
 
     script_dir = Path(__file__).parent
     env_type = env_info['k8s_type']
@@ -264,21 +611,37 @@ def pre_build_all_images(env_info):
 
     print_info(f"Found {len(images_to_build)} images to build")
 
-    # Build images sequentially (parallel can overwhelm system)
+    # Build in parallel, bounded by CPU and memory. Each finished image is
+    # handed to a single loader thread, so loading one image into the
+    # cluster overlaps with building the next.
+    jobs = build_parallelism(len(images_to_build))
+    print_info(f"Building up to {jobs} images at a time")
     successful = 0
     failed = 0
 
-    for i, img in enumerate(images_to_build, 1):
-        print_info(f"[{i}/{len(images_to_build)}] Building {img['name']}...")
-        build_args = img.get('build_args')
-        success, message = build_image(img['dockerfile'], img['tag'], img['context'], env_type, build_args)
+    with ThreadPoolExecutor(max_workers=jobs) as builders, ThreadPoolExecutor(max_workers=1) as loader:
+        builds = {
+            builders.submit(build_image, img['dockerfile'], img['tag'], img['context'],
+                            env_type, img.get('build_args')): img
+            for img in images_to_build
+        }
+        loads = []
+        for future in as_completed(builds):
+            img = builds[future]
+            success, message, _ = future.result()
 
-        if success:
-            print_success(f"  {message}")
-            successful += 1
-        else:
-            print_warning(f"  {message}")
-            failed += 1
+            if success:
+                print_success(f"  {img['name']}: {message}")
+                successful += 1
+                loads.append(loader.submit(load_image, img['tag'], env_type, env_info.get('registry')))
+            else:
+                print_warning(f"  {img['name']}: {message}")
+                failed += 1
+
+        for future in loads:
+            load_success, message = future.result()
+            if message:
+                (print_success if load_success else print_warning)(f"  {message}")
 
     print_header(f"📊 Build Summary: {successful} succeeded, {failed} failed")
 
@@ -288,32 +651,103 @@ def pre_build_all_images(env_info):
 
     return successful > 0
 
-def create_namespaces():
-    """Pre-create all namespaces used by scenarios"""
-    print_step("Creating Kubernetes namespaces...")
-
-    namespaces = [
-        ("voting-app", "Scenario 01 - Python Deploy"),
-        ("secure-todo", "Scenario 02 - Secret Automation"),
-        ("blue-green-demo", "Scenario 03 - Blue-Green Deployment")
-    ]
+# Namespaces the scenarios deploy into
+SCENARIO_NAMESPACES = [
+    ("voting-app", "Scenario 01 - Python Deploy"),
+    ("secure-todo", "Scenario 02 - Secret Automation"),
+    ("blue-green-demo", "Scenario 03 - Blue-Green Deployment")
+]
+# Owner of the fields setup applies; re-applying the same objects is a no-op
+FIELD_MANAGER = "workshop-setup"
+
+def bootstrap_manifests(env_info):
+    """Namespaces and shared objects every scenario expects, as manifests"""
+    manifests = [{
+        'apiVersion': 'v1', 'kind': 'Namespace',
+        'metadata': {
+            'name': ns,
+            'labels': {'app.kubernetes.io/part-of': 'kubernetes-workshop'},
+            'annotations': {'workshop/description': description},
+        },
+    } for ns, description in SCENARIO_NAMESPACES]
+
+    # Advertise the local registry to tools that look for it (KEP-1755)
+    if env_info.get('registry'):
+        manifests.append({
+            'apiVersion': 'v1', 'kind': 'ConfigMap',
+            'metadata': {'name': 'local-registry-hosting', 'namespace': 'kube-public'},
+            'data': {'localRegistryHosting.v1': f'host: "{env_info["registry"]}"'},
+        })
+    return manifests
 
-    created = 0
-    for ns, description in namespaces:
-        success, _, _ = run_command(f"kubectl create namespace {ns}")
-        if success:
-            print_success(f"Created namespace: {ns} ({description})")
-            created += 1
-        else:
-            # Check if it already exists
-            success, _, _ = run_command(f"kubectl get namespace {ns}")
-            if success:
-                print_info(f"Namespace already exists: {ns}")
+def apply_with_api(manifests):
+    """Server-side apply every manifest at once over one API connection.
+    Returns {'Kind/name': error message or None}."""
+    try:
+        k8s_config.load_kube_config()
+    except k8s_config.ConfigException:
+        k8s_config.load_incluster_config()
+    configuration = k8s_client.Configuration.get_default_copy()
+    configuration.connection_pool_maxsize = max(4, len(manifests))
+    core = k8s_client.CoreV1Api(k8s_client.ApiClient(configuration))
+    options = {'field_manager': FIELD_MANAGER, 'force': True, '_content_type': 'application/apply-patch+yaml'}
+
+    def apply(manifest):
+        metadata = manifest['metadata']
+        try:
+            if manifest['kind'] == 'Namespace':
+                core.patch_namespace(metadata['name'], manifest, **options)
             else:
-                print_warning(f"Failed to create namespace: {ns}")
+                core.patch_namespaced_config_map(metadata['name'], metadata['namespace'], manifest, **options)
+            return None
+        except ApiException as e:
+            return f"{e.status} {e.reason}"
+
+    with ThreadPoolExecutor(max_workers=len(manifests)) as pool:
+        errors = pool.map(apply, manifests)
+        return {f"{m['kind']}/{m['metadata']['name']}": error for m, error in zip(manifests, errors)}
+
+def apply_with_kubectl(manifests):
+    """Same as apply_with_api, as one `kubectl apply --server-side` of a List"""
+    document = json.dumps({'apiVersion': 'v1', 'kind': 'List', 'items': manifests})
+    # Fed on stdin without a shell, so quotes or % in a value can't break it
+    try:
+        result = subprocess.run(
+            ['kubectl', 'apply', '--server-side', '--force-conflicts',
+             f'--field-manager={FIELD_MANAGER}', '-f', '-'],
+            input=document, capture_output=True, text=True, timeout=300)
+        success, error = result.returncode == 0, result.stderr.strip()
+    except (subprocess.TimeoutExpired, OSError) as e:
+        success, error = False, str(e)
+    return {f"{m['kind']}/{m['metadata']['name']}": None if success else error[:100] for m in manifests}
+
+@traced
+def bootstrap_cluster_resources(env_info):
+    """Apply all namespaces and shared resources used by scenarios"""
+    print_step("Applying Kubernetes namespaces and shared resources...")
+
+    manifests = bootstrap_manifests(env_info)
+    if k8s_client:
+        try:
+            results = apply_with_api(manifests)
+        except Exception as e:
+            print_warning(f"Kubernetes API client unavailable ({e}), using kubectl")
+            results = apply_with_kubectl(manifests)
+    else:
+        results = apply_with_kubectl(manifests)
+
+    descriptions = dict(SCENARIO_NAMESPACES)
+    for resource, error in results.items():
+        kind, name = resource.split('/', 1)
+        label = f"{kind.lower()}: {name}" + (f" ({descriptions[name]})" if name in descriptions else "")
+        if error:
+            print_warning(f"Failed to apply {label} - {error}")
+        else:
+            print_success(f"Applied {label}")
 
-    return True
+    return not any(results.values())
 
+@traced
 def verify_image_availability():
     """Verify that all built images are available"""
     print_step("Verifying built images are available...")
@@ -341,7 +775,35 @@ def verify_image_availability():
 
     return True
 
-def show_optimization_report(env_info, build_time):
+def show_timing_report(previous):
+    """Per-phase durations against the previous run, plus the slowest items"""
+    durations = profiler.durations()
+    phases = [e for e in profiler.events if e.get('cat') == 'phase']
+    items = sorted((e for e in profiler.events if e.get('cat') in ('pull', 'build', 'load')),
+                   key=lambda e: e['dur'], reverse=True)
+
+    print_header("⏱️  Where the Time Went")
+    print(f"\n   {'phase':<28} {'this run':>9} {'previous':>9} {'change':>9}  {'cpu s':>7} {'disk MB':>8} {'net MB':>7}")
+    for event in phases:
+        name = event['name']
+        seconds = durations[name]
+        before = previous.get(name)
+        counters = event['args']
+        disk = counters.get('disk_read_bytes', 0) + counters.get('disk_write_bytes', 0)
+        net = counters.get('net_rx_bytes', 0) + counters.get('net_tx_bytes', 0)
+        print(f"   {name:<28} {seconds:>8.1f}s "
+              + (f"{before:>8.1f}s {seconds - before:>+8.1f}s" if before is not None else f"{'-':>9} {'-':>9}")
+              + f"  {counters.get('host_cpu_s', counters.get('child_cpu_s', 0)):>7.1f}"
+              f" {disk / 1e6:>8.1f} {net / 1e6:>7.1f}")
+
+    if items:
+        print("\n   Slowest steps:")
+        for event in items[:5]:
+            print(f"   • {event['name']:<45} {event['dur'] / 1e6:>6.1f}s")
+
+    print(f"\n   Trace: {TRACE_FILE} (open in https://ui.perfetto.dev or chrome://tracing)")
+
+def show_optimization_report(env_info, build_time, previous=None):
     """Show final optimization report"""
     print_header("🎉 OPTIMIZATION COMPLETE!")
 
@@ -350,6 +812,9 @@ def show_optimization_report(env_info, build_time):
     print(f"\n⏱️  Total optimization time: {build_time:.1f} seconds")
     print(f"🚀 Kubernetes environment: {env_info['k8s_type']}")
 
+    if previous is not None:
+        show_timing_report(previous)
+
     print_header("📋 What's Ready")
 
     print("\n✅ Pre-built Docker images:")
@@ -360,17 +825,19 @@ def show_optimization_report(env_info, build_time):
     print("   • blue-green-demo:latest (Scenario 03)")
     print("   • blue-green-enhanced:latest (Scenario 03 - Enhanced) 🌟")
 
+    if env_info.get('registry'):
+        print(f"\n✅ Images pushed to the local registry at {env_info['registry']}")
+        print("   Deploy scripts use it when you export:")
+        print(f"   export WORKSHOP_REGISTRY={env_info['registry']}")
+
     print("\n✅ Pre-created namespaces:")
     print("   • voting-app (Scenario 01)")
     print("   • secure-todo (Scenario 02)")
     print("   • blue-green-demo (Scenario 03)")
 
     print("\n✅ Pre-pulled base images:")
-    print("   • python:3.11-slim")
-    print("   • python:3.11-alpine")
-    print("   • redis:alpine")
-    print("   • postgres:15-alpine")
-    print("   • nginx:alpine")
+    for image in BASE_IMAGES:
+        print(f"   • {image}")
 
     print_header("🚀 Quick Start - Scenarios Ready to Run!")
 
@@ -450,10 +917,17 @@ def main():
         if not pre_pull_base_images():
             print_warning("Base image pre-pull had issues, but continuing...")
 
-        # Create namespaces
+        # Optional local registry for image distribution
+        if os.getenv('SETUP_LOCAL_REGISTRY'):
+            print("\n")
+            env_info['registry'] = start_local_registry(env_info)
+            if not env_info['registry']:
+                print_warning("Falling back to loading images directly into the cluster")
+
+        # Namespaces and shared resources, in one declarative apply
         print("\n")
-        if not create_namespaces():
-            print_warning("Namespace creation had issues, but continuing...")
+        if not bootstrap_cluster_resources(env_info):
+            print_warning("Resource bootstrap had issues, but continuing...")
 
         # Pre-build all images (THE BIG ONE!)
         print("\n")
@@ -465,10 +939,13 @@ def main():
         print("\n")
         verify_image_availability()
 
+        # Save the timing trace, keeping the previous run's for comparison
+        previous = profiler.write(TRACE_FILE)
+
         # Show final report
         elapsed = time.time() - start_time
         print("\n")
-        show_optimization_report(env_info, elapsed)
+        show_optimization_report(env_info, elapsed, previous)
 
         return True
 